@@ -26,23 +26,28 @@ def seed_everything(seed):
         random.seed(seed)
         np.random.seed(seed)
 
-seed_everything(42)  # Ensures reproducible randomness
+DEFAULT_SEED = 42 # Seed of the Grasshopper component while its "seed" input is unset
 
 # --------------------------------------------------------------------------
 # Core Agent Class
 # --------------------------------------------------------------------------
 class Agent:
     """Represents a single agent on a surface."""
-    def __init__(self, id, position, velocity, surface, slope_weight=1.0, curvature_weight=1.0): # Initializes an agent
+    def __init__(self, id, position, velocity, surface, slope_weight=1.0, curvature_weight=1.0, domains=None): # Initializes an agent
         self.id = id
         self.position = position
         self.velocity = velocity
         self.surface = surface
+        # Parameter domains of the surface, ((u0, u1), (v0, v1)) - looked up when not passed in
+        self.u_domain, self.v_domain = domains or (rs.SurfaceDomain(surface, 0), rs.SurfaceDomain(surface, 1))
         self.age = 0
         self.history = [position]
         self.slope_weight = slope_weight
         self.curvature_weight = curvature_weight
 
+        # Separation/cohesion force in UV space (assigned externally each tick, see spatial_hash.py)
+        self.neighbour_force = (0.0, 0.0)
+
         # UV coordinates in [0,1] for heightmap indexing
         self.uv = (0, 0)
 
@@ -50,6 +55,8 @@ class Agent:
         self.heightmap = None
         self.U_grid = None
         self.V_grid = None
+        self.dH_du = None # Optional precomputed slopes (out_dH_du / out_dH_dv of surface_generator.py)
+        self.dH_dv = None
 
     def sense(self, heightmap, U_grid, V_grid): # Computes environmental signals at the agent’s location
         """Sample slope and curvature signals at the agent's current position."""
@@ -60,10 +67,15 @@ class Agent:
         u_idx = np.argmin(np.abs(u_vals - self.uv[0]))
         v_idx = np.argmin(np.abs(v_vals - self.uv[1]))
 
-        # Compute slope using finite differences
-        dH_du = np.gradient(heightmap, axis=1) # Finite-difference approximation of height change in U
-        dH_dv = np.gradient(heightmap, axis=0) # # Finite-difference approximation of height change in V
-        slope = np.sqrt(dH_du[v_idx, u_idx]**2 + dH_dv[v_idx, u_idx]**2) # Gradient magnitude expressed as scalar slope value.
+        # Slope from the surface generator's analytic derivatives; finite differences only as a fallback
+        if self.dH_du is not None and self.dH_dv is not None:
+            du_here = self.dH_du[v_idx, u_idx]
+            dv_here = self.dH_dv[v_idx, u_idx]
+        else:
+            dH_dv, dH_du = np.gradient(heightmap, v_vals, u_vals) # Height change per unit of normalized U and V
+            du_here = dH_du[v_idx, u_idx]
+            dv_here = dH_dv[v_idx, u_idx]
+        slope = np.sqrt(du_here**2 + dv_here**2) # Gradient magnitude expressed as scalar slope value.
         self.slope_signal = slope * self.slope_weight
 
         # Compute curvature on the surface
@@ -72,7 +84,7 @@ class Agent:
             curvature = rs.SurfaceCurvature(self.surface, uv) # Evaluation of curvature
             if curvature:
                 k1 = curvature[2] # Principal curvature k1
-                k2 = curvature[3] # # Principal curvature k2
+                k2 = curvature[4] # Principal curvature k2 (index 3 is the k1 direction vector)
                 k = k1 + k2 # Total principal curvature
             else:
                 k = 0
@@ -84,51 +96,70 @@ class Agent:
     def decide(self, du=0.01, dv=0.01): # Determines motion direction from sensed data
         """Update velocity based on sensed slope and curvature."""
         u, v = self.uv # Current UV coordinates
-        pt_center = rs.EvaluateSurface(self.surface, u, v) # Agent’s current 3D position
-        pt_u = rs.EvaluateSurface(self.surface, u + du, v) # Nearby samples along U direction
-        pt_v = rs.EvaluateSurface(self.surface, u, v + dv) # Nearby samples along V directions
+        pt_center = self.evaluate(u, v) # Agent’s current 3D position
+        pt_u = self.evaluate(u + du, v) # Nearby samples along U direction
+        pt_v = self.evaluate(u, v + dv) # Nearby samples along V directions
 
         slope_vec = [(pt_u[i] - pt_center[i]) * (-1) for i in range(3)] # # Approximates downhill direction on the surface in u-direction
         slope_vec_v = [(pt_v[i] - pt_center[i]) * (-1) for i in range(3)] # Approximates downhill direction on the surface in v-direction
         slope_vec_combined = [(slope_vec[i] + slope_vec_v[i]) * self.slope_weight for i in range(3)] # Combines slopes in u and v-direction and applies weighting
         curvature_vec = [-slope_vec_combined[i] * self.curvature_signal for i in range(3)] 
         self.velocity = [slope_vec_combined[i] + curvature_vec[i] for i in range(3)] # Final velocity vector
+        fu, fv = getattr(self, "neighbour_force", (0.0, 0.0)) # Optional agent-agent terms (zero unless set by the simulator)
+        self.velocity[0] += fu
+        self.velocity[1] += fv
 
-    def move(self, du=0.01, dv=0.01): # Advances the agent in UV space
-        """Update agent position constrained to surface."""
+    def move(self, du=0.01, dv=0.01, max_step=None): # Advances the agent in UV space
+        """Update agent position constrained to surface. max_step bounds the UV step (CFL-style)."""
         u, v = self.uv # Current UV coordinates
-        u_new = max(0.0, min(1.0, u + self.velocity[0] * du)) # Updates U-coordinates with velocity influence and boundary clamping
-        v_new = max(0.0, min(1.0, v + self.velocity[1] * dv)) # Updates V-coordinates with velocity influence and boundary clamping
+        step_u = self.velocity[0] * du
+        step_v = self.velocity[1] * dv
+        if max_step is not None:
+            length = (step_u**2 + step_v**2) ** 0.5
+            if length > max_step: # Shrinks the time step on steep slopes so no grid cell is skipped
+                step_u *= max_step / length
+                step_v *= max_step / length
+        u_new = max(0.0, min(1.0, u + step_u)) # Updates U-coordinates with velocity influence and boundary clamping
+        v_new = max(0.0, min(1.0, v + step_v)) # Updates V-coordinates with velocity influence and boundary clamping
         self.uv = (u_new, v_new)
-        self.position = rs.EvaluateSurface(self.surface, self.uv) # Maps UV back into 3D space
+        self.position = self.evaluate(self.uv[0], self.uv[1]) # Maps UV back into 3D space
         self.history.append(self.position)
         self.age += 1 # Logs trajectory and increments time
 
-    def update(self): # Executes the full cycle  (sense -> decide -> act)
+    def evaluate(self, u, v): # 3D point at normalized (u, v), mapped to the surface's own parameter domain
+        u0, u1 = self.u_domain
+        v0, v1 = self.v_domain
+        return rs.EvaluateSurface(self.surface, u0 + u * (u1 - u0), v0 + v * (v1 - v0))
+
+    def update(self, max_step=None): # Executes the full cycle  (sense -> decide -> act)
         """Perform one update cycle using internally stored heightmap and grids."""
         self.sense(self.heightmap, self.U_grid, self.V_grid)
         self.decide()
-        self.move()
+        self.move(max_step=max_step)
 
 # --------------------------------------------------------------------------
 # Factory function: Build agents on surface
 # --------------------------------------------------------------------------
-def build_agents(num_agents, surface, heightmap, U_grid, V_grid, slope_weight=1.0, curvature_weight=1.0): # Creates and initializes the agent population
+def build_agents(num_agents, surface, heightmap, U_grid, V_grid, slope_weight=1.0, curvature_weight=1.0, seed=None,
+                 dH_du=None, dH_dv=None): # Creates and initializes the agent population
     """
     Create a list of agents randomly distributed over the entire surface.
     UVs are correctly mapped from [0,1] to surface domains.
+    Passing a seed reseeds the generators so each run is reproducible on its own.
+    dH_du / dH_dv (optional) are the slope grids from surface_generator.py, used as-is.
     """
+    seed_everything(seed) # No-op for seed=None (continues the current random state)
     agents = [] # Empty list to store agents
     num_agents = int(num_agents) # Ensure slider input is integer-type
 
+    u_domain = rs.SurfaceDomain(surface, 0) # True surface u-domain
+    v_domain = rs.SurfaceDomain(surface, 1) # True surface v-domain
+
     for i in range(num_agents):
         # Random normalized UV in [0,1]
         u_norm = random.random()
         v_norm = random.random()
 
-        # Map to actual surface domain
-        u_domain = rs.SurfaceDomain(surface, 0) # True surface u-domain
-        v_domain = rs.SurfaceDomain(surface, 1) # True surface v-domain
         # Maps normalized UV to surface space
         u = u_domain[0] + u_norm * (u_domain[1] - u_domain[0]) 
         v = v_domain[0] + v_norm * (v_domain[1] - v_domain[0])
@@ -149,7 +180,8 @@ def build_agents(num_agents, surface, heightmap, U_grid, V_grid, slope_weight=1.
             velocity=velocity,
             surface=surface,
             slope_weight=slope_weight,
-            curvature_weight=curvature_weight
+            curvature_weight=curvature_weight,
+            domains=(u_domain, v_domain)
         )
 
         # Store UV and grid info internally for updates
@@ -157,6 +189,8 @@ def build_agents(num_agents, surface, heightmap, U_grid, V_grid, slope_weight=1.
         agent.heightmap = heightmap
         agent.U_grid = U_grid
         agent.V_grid = V_grid
+        agent.dH_du = dH_du
+        agent.dH_dv = dH_dv
 
         agents.append(agent)
 
@@ -176,7 +210,10 @@ class MyComponent(Grasshopper.Kernel.GH_ScriptInstance):
             U_grid,
             V_grid,
             slope_weight,
-            curvature_weight):
+            curvature_weight,
+            dH_du=None,
+            dH_dv=None,
+            seed=None):
 
         # Convert GH wrapper or GUID to Rhino surface
         surface_geom = getattr(surface, "Geometry", surface) # Unwraps GH_Surface
@@ -200,7 +237,10 @@ class MyComponent(Grasshopper.Kernel.GH_ScriptInstance):
                 U_grid=U_grid,
                 V_grid=V_grid,
                 slope_weight=slope_weight,
-                curvature_weight=curvature_weight
+                curvature_weight=curvature_weight,
+                dH_du=dH_du,
+                dH_dv=dH_dv,
+                seed=DEFAULT_SEED if seed is None else int(seed) # Reproducible per build, varied via the seed input
             )
 
         # Return persistent agent list
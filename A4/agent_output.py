@@ -0,0 +1,52 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+Bulk output helpers for the agent simulation. Agent positions and velocity
+segments are gathered into flat NumPy arrays once per solve and, for
+display in Grasshopper, converted in one go into a single PointCloud and a
+list of Line structs. Neither creates document objects, unlike one
+rs.AddPoint + rs.AddLine per agent. The array functions are NumPy-only so
+the batch runner can use them without Rhino.
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+import numpy as np
+
+OUTPUT_MODES = ("document", "bulk", "arrays") # Legacy rs objects, Rhino geometry, NumPy arrays
+
+# --------------------------------------------------------------------------
+# Flat arrays (NumPy only)
+# --------------------------------------------------------------------------
+def agent_arrays(agents):
+    """Return (N, 3) positions and (N, 2, 3) velocity segments for a list of Agent objects."""
+    # Point3d/Vector3d are indexed explicitly so Rhino and plain tuples both work
+    positions = np.array([(a.position[0], a.position[1], a.position[2]) for a in agents], dtype=float).reshape(-1, 3)
+    velocities = np.array([(a.velocity[0], a.velocity[1], a.velocity[2]) for a in agents], dtype=float).reshape(-1, 3)
+    return positions, np.stack((positions, positions + velocities), axis=1)
+
+def swarm_arrays(swarm, field):
+    """Return (N, 3) positions and (N, 2, 3) velocity segments for an agent_swarm.Swarm."""
+    positions = field.points(swarm.uv)
+    return positions, np.stack((positions, positions + swarm.velocity), axis=1)
+
+def save_arrays(path, positions, segments): # Headless output for the batch runner
+    np.savez_compressed(path, positions=positions, segments=segments)
+
+# --------------------------------------------------------------------------
+# Bulk Rhino geometry (no document objects)
+# --------------------------------------------------------------------------
+def to_point_cloud(positions):
+    """Single Rhino.Geometry.PointCloud from (N, 3) positions."""
+    import Rhino
+    cloud = Rhino.Geometry.PointCloud()
+    cloud.AddRange([Rhino.Geometry.Point3d(x, y, z) for x, y, z in positions.tolist()])
+    return cloud
+
+def to_lines(segments):
+    """List of Rhino.Geometry.Line structs (value types, never added to the document)."""
+    import Rhino
+    return [Rhino.Geometry.Line(a[0], a[1], a[2], b[0], b[1], b[2]) for a, b in segments.tolist()]
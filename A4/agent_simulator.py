@@ -5,13 +5,44 @@
 # Inputs:
 #   - agents : list of Agent instances (from Component 2)
 #   - tick   : trigger to advance simulation
+#   - separation_weight, cohesion_weight, neighbour_radius (optional):
+#            agent-agent forces via a UV spatial hash, off when unset
+#   - output_mode (optional): "bulk" (default), "document" or "arrays"
+#   - adaptive, sleep_threshold, sleep_ticks (optional): CFL-bounded steps and
+#            skipping of agents that moved less than sleep_threshold for sleep_ticks ticks
+#   - profile (optional): time sense/decide/move per tick and count rs calls
+#   - profile_allocations, profile_reset (optional): also track allocations;
+#            start a new report (one also starts when the agents change)
 # Outputs:
-#   - P : points representing agent positions
-#   - V : lines representing agent velocities
+#   - P : agent positions (one PointCloud, rs points, or an (N, 3) array)
+#   - V : velocity vectors (Line structs, rs lines, or an (N, 2, 3) array)
+#   - settled   : number of sleeping agents
+#   - skipped   : agent updates skipped by sleeping in this tick (the saved work)
+#   - converged : True once every agent sleeps (stop pressing tick)
+#   - profile_report : JSON report aggregated over all profiled ticks (None when off)
 # ---------------------------------------------------------------------------
 
 import rhinoscriptsyntax as rs
 import scriptcontext as sc
+import numpy as np
+
+# A4/ (sibling modules) and the shared/ folder must be importable. Preferred: add both to the
+# Rhino Python search paths once (see "Running the Grasshopper scripts" in the README). Otherwise
+# they are found relative to the saved .gh file - there is no guessing from the working directory.
+import os, sys
+try:
+    import agent_output, profiling
+except ImportError:
+    _doc = ghenv.Component.OnPingDocument()
+    if _doc is None or not _doc.FilePath: # Unsaved definition: nothing to resolve the folders from
+        raise ImportError("A4/ and shared/ are not importable: save the .gh file in its assignment folder "
+                          "or add <repo>/A4 and <repo>/shared to the Rhino Python search paths (see README)")
+    _gh_folder = os.path.dirname(_doc.FilePath) # Assignment folder holding the .gh file
+    for _folder in (_gh_folder, os.path.join(os.path.dirname(_gh_folder), "shared")):
+        if _folder not in sys.path:
+            sys.path.append(_folder)
+from agent_output import OUTPUT_MODES, agent_arrays, to_point_cloud, to_lines
+from profiling import Profiler
 
 # ---------------------------------------------------------------------------
 # Use scriptcontext.sticky for persistent storage
@@ -30,35 +61,175 @@ else:
 # Retrieve stored agents
 agents_storage = sc.sticky["agents_storage"]
 
+# ---------------------------------------------------------------------------
+# Optional adaptive stepping and sleeping (inputs may not exist on older component versions)
+# ---------------------------------------------------------------------------
+# Each input is read on its own, so a missing one never disables the others
+try:
+    adaptive_on = bool(adaptive)
+except NameError:
+    adaptive_on = False
+try:
+    threshold = float(sleep_threshold or 0.0) # World units per tick counted as "not moving"
+except NameError:
+    threshold = 0.0
+try:
+    patience = int(sleep_ticks or 10)
+except NameError:
+    patience = 10
+
+max_step = None
+if adaptive_on and agents_storage:
+    rows, cols = np.shape(agents_storage[0].heightmap)
+    max_step = 0.5 / (max(rows, cols) - 1) # CFL bound: at most half a heightmap cell per tick
+
+# ---------------------------------------------------------------------------
+# Optional profiling - one Profiler per run, kept in sticky so ticks accumulate
+# ---------------------------------------------------------------------------
+try:
+    profiling_on = bool(profile)
+except NameError:
+    profiling_on = False
+try:
+    allocations_on = bool(profile_allocations) # tracemalloc is opt-in: it slows every allocation
+except NameError:
+    allocations_on = False
+try:
+    reset_profile = bool(profile_reset) # Explicitly start a new report
+except NameError:
+    reset_profile = False
+
+run_profiler = sc.sticky.get("agent_profiler")
+profiled_agents = sc.sticky.get("agent_profiler_agents", [])
+# A new run starts when the agents themselves change (GH hands over a fresh list every solve,
+# so the list identity is not enough), on reset, or when allocation tracking is toggled
+same_agents = len(profiled_agents) == len(agents_storage) and all(
+    a is b for a, b in zip(profiled_agents, agents_storage))
+if profiling_on:
+    if run_profiler is None or reset_profile or not same_agents or run_profiler.track_allocations != allocations_on:
+        if run_profiler is not None:
+            run_profiler.close()
+        run_profiler = sc.sticky["agent_profiler"] = Profiler(enabled=True, track_allocations=allocations_on,
+                                                              label="agent_simulator")
+        sc.sticky["agent_profiler_agents"] = list(agents_storage)
+    run_profiler.resume() # Allocation tracing only runs during this component's solves
+    prof = run_profiler
+else:
+    if run_profiler is not None:
+        run_profiler.close()
+    prof = Profiler(enabled=False)
+
+rs = prof.instrument(rs) # Counts rs calls made by this component (e.g. "document" output mode)
+if agents_storage:
+    # Agent methods look up rs in the namespace of agent_builder; swap in the counting proxy there
+    _agent_namespace = type(agents_storage[0]).update.__globals__
+    _agent_namespace["rs"] = prof.instrument(_agent_namespace["rs"])
+
 # ---------------------------------------------------------------------------
 # STEP SIMULATION: update each agent if tick is pressed
 # ---------------------------------------------------------------------------
+skipped = 0 # Agent updates saved by sleeping in this solve
 if tick:
+    prof.begin_tick(max([getattr(agent, "age", 0) for agent in agents_storage] or [0]))
+    # Optional agent-agent forces (inputs may not exist on older component versions)
+    try:
+        sep_w = float(separation_weight or 0.0)
+        coh_w = float(cohesion_weight or 0.0)
+        radius = float(neighbour_radius or 0.05)
+    except NameError:
+        sep_w, coh_w, radius = 0.0, 0.0, 0.05
+
+    if (sep_w or coh_w) and agents_storage:
+        from spatial_hash import UVSpatialHash, neighbour_forces # Only needed while agent-agent forces are on
+        with prof.span("neighbours"):
+            uv = np.array([agent.uv for agent in agents_storage], dtype=float) # All agent UVs in one array
+            pairs = UVSpatialHash(radius).rebuild(uv).query_pairs() # Neighbours within radius
+            forces = neighbour_forces(uv, pairs, radius, sep_w, coh_w)
+            for agent, force in zip(agents_storage, forces):
+                agent.neighbour_force = (force[0], force[1])
+    else:
+        for agent in agents_storage:
+            agent.neighbour_force = (0.0, 0.0) # Clears forces left over from ticks with non-zero weights
+
     for agent in agents_storage:
+        if threshold > 0 and getattr(agent, "calm", 0) >= patience:
+            # Wake the sleeper if its neighbour force changed enough to move it by the threshold
+            rest = getattr(agent, "rest_force", (0.0, 0.0)) # Force it fell asleep under
+            fu = agent.neighbour_force[0] - rest[0]
+            fv = agent.neighbour_force[1] - rest[1]
+            if fu or fv:
+                u = max(0.0, min(1.0, agent.uv[0] + fu * 0.01)) # Same step size as Agent.move
+                v = max(0.0, min(1.0, agent.uv[1] + fv * 0.01))
+                if rs.Distance(agent.position, agent.evaluate(u, v)) >= threshold:
+                    agent.calm = 0
+            if agent.calm >= patience:
+                skipped += 1
+                continue # Sleeping agent - skips sense/decide/move and most surface evaluations
+        previous = agent.position
+        # Same as agent.update(max_step), split so each phase gets its own timer
         # Each agent has heightmap, U_grid, V_grid stored internally
-        agent.update()  # Performs sense -> decide -> move
+        with prof.span("sense"):
+            agent.sense(agent.heightmap, agent.U_grid, agent.V_grid)
+        with prof.span("decide"):
+            agent.decide()
+        with prof.span("move"):
+            agent.move(max_step=max_step)
+        if threshold > 0:
+            moved = rs.Distance(previous, agent.position)
+            agent.calm = getattr(agent, "calm", 0) + 1 if moved < threshold else 0
+            if agent.calm == patience:
+                agent.rest_force = agent.neighbour_force # Reference for waking up again
+        prof.count("agent updates")
+    prof.count("agent updates skipped", skipped)
+    prof.end_tick()
+
+settled = sum(1 for agent in agents_storage if threshold > 0 and getattr(agent, "calm", 0) >= patience)
+converged = bool(agents_storage) and settled == len(agents_storage) # Swarm-level stop criterion
 
 # ---------------------------------------------------------------------------
 # VISUALIZATION
 # ---------------------------------------------------------------------------
-P = []  # Points representing agent positions
-V = []  # Lines representing velocity vectors
-
-for agent in agents_storage:
-    # Add point at agent's current position
-    P.append(rs.AddPoint(agent.position[0], agent.position[1], agent.position[2]))
-    
-    # Compute end point for velocity vector
-    end_point = (
-        agent.position[0] + agent.velocity[0],
-        agent.position[1] + agent.velocity[1],
-        agent.position[2] + agent.velocity[2]
-    )
-    # Add line representing velocity vector
-    V.append(rs.AddLine(agent.position, end_point))
+try:
+    mode = str(output_mode or "bulk").lower()
+except NameError:
+    mode = "bulk" # Input not present on older component versions
+if mode not in OUTPUT_MODES:
+    raise ValueError(f"output_mode must be one of {OUTPUT_MODES}. Got {mode!r}")
+
+with prof.span("output"):
+    if mode == "document":
+        P = []  # Points representing agent positions
+        V = []  # Lines representing velocity vectors
+
+        for agent in agents_storage:
+            # Add point at agent's current position
+            P.append(rs.AddPoint(agent.position[0], agent.position[1], agent.position[2]))
+
+            # Compute end point for velocity vector
+            end_point = (
+                agent.position[0] + agent.velocity[0],
+                agent.position[1] + agent.velocity[1],
+                agent.position[2] + agent.velocity[2]
+            )
+            # Add line representing velocity vector
+            V.append(rs.AddLine(agent.position, end_point))
+    else:
+        positions, segments = agent_arrays(agents_storage) # Flat arrays, gathered once per solve
+        if mode == "bulk":
+            P = to_point_cloud(positions) # One point cloud instead of N document points
+            V = to_lines(segments) # Line structs, nothing is added to the document
+        else:
+            P = positions
+            V = segments
+
+profile_report = prof.to_json() if prof.enabled else None # Run totals + per-tick breakdown
+prof.close() # Stops allocation tracing until the next solve
 
 # ---------------------------------------------------------------------------
 # OUTPUTS
 # ---------------------------------------------------------------------------
-# P : list of points representing agent positions
-# V : list of lines representing agent velocities
+# P : agent positions (PointCloud / list of points / (N, 3) array)
+# V : agent velocities (list of Line structs / list of lines / (N, 2, 3) array)
+# settled, converged : sleeping agent count and swarm-level convergence flag
+# skipped : agent updates saved by sleeping in this tick
+# profile_report : JSON profiling report (None when profiling is off)
@@ -0,0 +1,246 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+NumPy-only counterpart of the Agent class in agent_builder.py. The whole
+swarm is stored as flat arrays (uv, velocity, age) and advanced with
+vectorized sense -> decide -> move steps, so it can run outside Grasshopper
+without rhinoscriptsyntax. The heightmap is treated as the surface graph
+z = H(u, v) over the normalized UV square.
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+from contextlib import nullcontext
+
+import numpy as np
+
+from spatial_hash import UVSpatialHash, neighbour_forces
+
+def _float_array(a): # Array view without a copy unless the input is not floating point
+    a = np.asarray(a)
+    return a if a.dtype.kind == "f" else a.astype(float)
+
+# --------------------------------------------------------------------------
+# Environment field (heightmap + derivatives, computed once)
+# --------------------------------------------------------------------------
+class HeightField:
+    """Heightmap with precomputed slope and curvature grids for fast sampling."""
+    ARRAYS = ("heightmap", "u_vals", "v_vals", "dH_du", "dH_dv", "curvature") # Everything sampling needs
+
+    def __init__(self, heightmap, U_grid, V_grid, size=1.0, dH_du=None, dH_dv=None): # Wraps the outputs of surface_generator.py
+        """
+        dH_du / dH_dv are optional analytic derivatives per unit of normalized UV
+        (SurfaceField.dH_du/dH_dv); without them the gradient is taken numerically.
+        """
+        self.heightmap = _float_array(heightmap) # float32 fields from surface_field.py are kept as they are
+        self.size = float(size) # World length of the UV square edge, sets slope/curvature units
+        self.u_vals = _float_array(U_grid)[0, :] # 1D array of U coordinates
+        self.v_vals = _float_array(V_grid)[:, 0] # 1D array of V coordinates
+        self.rows, self.cols = self.heightmap.shape
+
+        # Gradients in world units - computed once instead of once per agent per tick
+        x_vals = self.u_vals * self.size
+        y_vals = self.v_vals * self.size
+        if dH_du is not None and dH_dv is not None:
+            self.dH_du = _float_array(dH_du) / self.size
+            self.dH_dv = _float_array(dH_dv) / self.size
+        else:
+            self.dH_dv, self.dH_du = np.gradient(self.heightmap, y_vals, x_vals)
+
+        # Mean-curvature style signal (k1 + k2) of the graph z = H(u, v)
+        norm = np.sqrt(1.0 + self.dH_du**2 + self.dH_dv**2)
+        self.curvature = (np.gradient(self.dH_du / norm, x_vals, axis=1)
+                          + np.gradient(self.dH_dv / norm, y_vals, axis=0))
+
+    def arrays(self): # Named arrays, e.g. for sharing between processes
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays, size): # Rebuilds a field around existing arrays without copying
+        field = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(field, name, arrays[name])
+        field.size = float(size)
+        field.rows, field.cols = field.heightmap.shape
+        return field
+
+    def sample(self, grid, uv): # Bilinear interpolation of a field grid at every agent
+        """Bilinearly interpolate a (rows, cols) grid at (N, 2) normalized UVs."""
+        x = np.clip(uv[:, 0], 0.0, 1.0) * (self.cols - 1)
+        y = np.clip(uv[:, 1], 0.0, 1.0) * (self.rows - 1)
+        i0 = np.minimum(x.astype(np.intp), self.cols - 2)
+        j0 = np.minimum(y.astype(np.intp), self.rows - 2)
+        fx = x - i0
+        fy = y - j0
+        return ((grid[j0, i0] * (1 - fx) + grid[j0, i0 + 1] * fx) * (1 - fy)
+                + (grid[j0 + 1, i0] * (1 - fx) + grid[j0 + 1, i0 + 1] * fx) * fy)
+
+    def height_at(self, uv): # Surface height below every agent, bilinear like all other sampling
+        return self.sample(self.heightmap, uv)
+
+    def points(self, uv): # 3D positions on the graph surface
+        """Return (N, 3) world positions (u*size, v*size, H) for (N, 2) normalized UVs."""
+        return np.column_stack((uv * self.size, self.height_at(uv)))
+
+# --------------------------------------------------------------------------
+# Swarm state
+# --------------------------------------------------------------------------
+class Swarm:
+    """Array-based state of all agents plus the random generator driving them."""
+    def __init__(self, uv, velocity, age, rng, tick=0, calm=None, rest_force=None):
+        self.uv = uv # (N, 2) normalized UV coordinates in [0,1]
+        self.velocity = velocity # (N, 3) velocity vectors
+        self.age = age # (N,) time-step counters
+        self.rng = rng # np.random.Generator, stored in checkpoints for exact resume
+        self.tick = tick # Number of completed simulation steps
+        # (N,) consecutive ticks each agent moved less than the sleep threshold
+        self.calm = calm if calm is not None else np.zeros(uv.shape[0], dtype=np.int64)
+        # (N, 2) neighbour force each agent felt when it fell asleep (wake-up reference)
+        self.rest_force = rest_force if rest_force is not None else np.zeros((uv.shape[0], 2))
+
+    def __len__(self):
+        return self.uv.shape[0]
+
+    def rng_state(self): # Plain dict state of the bit generator
+        return self.rng.bit_generator.state
+
+    def set_rng_state(self, state):
+        self.rng.bit_generator.state = state
+
+    def wake(self, mask=slice(None)): # E.g. after swapping in a different field
+        self.calm[mask] = 0
+
+def build_swarm(num_agents, seed=None): # Vectorized counterpart of build_agents()
+    """
+    Create a swarm randomly distributed over the normalized UV square, with the
+    same small random initial velocities as build_agents() in agent_builder.py.
+    """
+    num_agents = int(num_agents) # Ensure slider input is integer-type
+    rng = np.random.default_rng(seed) # Own generator instead of the global seed
+    uv = rng.random((num_agents, 2)) # Random normalized UV in [0,1]
+    velocity = np.column_stack((
+        rng.uniform(-0.5, 0.5, num_agents),
+        rng.uniform(-0.5, 0.5, num_agents),
+        rng.uniform(-0.1, 0.1, num_agents),
+    )) # Small random velocity pertubation
+    age = np.zeros(num_agents, dtype=np.int64)
+    return Swarm(uv, velocity, age, rng)
+
+# --------------------------------------------------------------------------
+# Sense -> decide -> move
+# --------------------------------------------------------------------------
+def sense(swarm, field, slope_weight=1.0, curvature_weight=1.0, idx=slice(None)): # Samples signals for all agents at once
+    """
+    Return weighted slope and curvature signals plus the local gradient for agents `idx`.
+    Fields are interpolated bilinearly so the gradient fades smoothly to zero in
+    valleys (nearest-node sampling makes agents hop between grid nodes forever).
+    """
+    uv = swarm.uv[idx]
+    grad = np.column_stack((field.sample(field.dH_du, uv), field.sample(field.dH_dv, uv)))
+    slope_signal = np.sqrt(grad[:, 0]**2 + grad[:, 1]**2) * slope_weight
+    curvature_signal = field.sample(field.curvature, uv) * curvature_weight
+    return slope_signal, curvature_signal, grad
+
+def decide(swarm, grad, curvature_signal, slope_weight=1.0, jitter=0.0, neighbour_force=None, idx=slice(None)): # Velocity from sensed data
+    """
+    Update velocities of agents `idx`: downhill direction modulated by the
+    curvature signal, plus optional agent-agent forces in UV space.
+    """
+    downhill = -grad * slope_weight # Steepest descent in UV space, weighted
+    dz = -(grad[:, 0]**2 + grad[:, 1]**2) * slope_weight # Height change along the downhill direction
+    scale = (1.0 - curvature_signal)[:, None] # Same modulation as Agent.decide: v + (-v * k)
+    velocity = np.column_stack((downhill, dz)) * scale
+    if neighbour_force is not None: # Separation/cohesion terms, already weighted
+        velocity[:, :2] += neighbour_force
+    if jitter > 0.0: # Optional random perturbation, drawn from the swarm's own generator
+        velocity += swarm.rng.normal(0.0, jitter, velocity.shape)
+    swarm.velocity[idx] = velocity
+
+def move(swarm, du=0.01, dv=0.01, idx=slice(None), max_step=None): # Advances agents in UV space
+    """
+    Update UV positions of agents `idx` with velocity influence and boundary
+    clamping. With `max_step` set, each agent's time step is shrunk so it moves
+    at most `max_step` in UV space (CFL-style bound: no skipping over grid cells
+    on steep slopes, full step on gentle ones).
+    """
+    vel = swarm.velocity[idx]
+    step_u = vel[:, 0] * du
+    step_v = vel[:, 1] * dv
+    if max_step is not None:
+        length = np.sqrt(step_u**2 + step_v**2)
+        factor = np.minimum(1.0, max_step / np.maximum(length, 1e-300)) # dt_i = min(dt, CFL * h / |v_i|)
+        step_u *= factor
+        step_v *= factor
+    swarm.uv[idx, 0] = np.clip(swarm.uv[idx, 0] + step_u, 0.0, 1.0)
+    swarm.uv[idx, 1] = np.clip(swarm.uv[idx, 1] + step_v, 0.0, 1.0)
+    swarm.age[idx] += 1
+
+def sense_neighbours(swarm, radius, separation_weight=1.0, cohesion_weight=0.0): # Agent-agent interaction
+    """Rebuild the UV spatial hash and return weighted separation + cohesion forces."""
+    grid = UVSpatialHash(radius).rebuild(swarm.uv)
+    return neighbour_forces(swarm.uv, grid.query_pairs(), radius, separation_weight, cohesion_weight)
+
+_NULL_SPAN = nullcontext()
+
+def _no_span(name): # Stand-in for Profiler.span when no profiler is given
+    return _NULL_SPAN
+
+def tick(swarm, field, slope_weight=1.0, curvature_weight=1.0, du=0.01, dv=0.01, jitter=0.0,
+         separation_weight=0.0, cohesion_weight=0.0, neighbour_radius=0.05,
+         adaptive=False, cfl=0.5, sleep_threshold=0.0, sleep_ticks=10, converge_fraction=1.0,
+         profiler=None):
+    """
+    Perform one full update cycle (sense -> decide -> move) for every awake agent.
+
+    Neighbour forces are only computed when a separation or cohesion weight is set.
+    With `adaptive`, steps are bounded to `cfl` heightmap cells per tick.
+    With `sleep_threshold` > 0, agents whose displacement (world units) stayed
+    below it for `sleep_ticks` ticks are skipped; the swarm counts as converged
+    once `converge_fraction` of the agents are asleep. A sleeper wakes up when
+    its neighbour force changes enough, compared with the force it fell asleep
+    under, to move it by more than `sleep_threshold` in one tick. The field is
+    not watched - call swarm.wake() after replacing it.
+
+    An optional profiling.Profiler (shared/profiling.py) times sense, neighbours,
+    decide and move.
+
+    Returns a dict with awake, settled, skipped (agent updates saved) and converged.
+    """
+    span = profiler.span if profiler is not None else _no_span
+    n = len(swarm)
+    sleeping = sleep_threshold > 0.0
+
+    force = None
+    if separation_weight or cohesion_weight: # Hash over all agents - sleepers still repel
+        with span("neighbours"):
+            force = sense_neighbours(swarm, neighbour_radius, separation_weight, cohesion_weight)
+        if sleeping: # Wake sleepers whose neighbourhood changed (e.g. an awake agent pushed into them)
+            push = np.sqrt(((force - swarm.rest_force)**2).sum(axis=1)) * max(du, dv) * field.size
+            swarm.calm[(swarm.calm >= sleep_ticks) & (push >= sleep_threshold)] = 0
+    idx = np.nonzero(swarm.calm < sleep_ticks)[0] if sleeping else slice(None)
+
+    with span("sense"):
+        _, curvature_signal, grad = sense(swarm, field, slope_weight, curvature_weight, idx)
+    with span("decide"):
+        decide(swarm, grad, curvature_signal, slope_weight, jitter,
+               force[idx] if force is not None else None, idx)
+
+    max_step = cfl / (max(field.rows, field.cols) - 1) if adaptive else None
+    previous = swarm.uv[idx].copy() if sleeping else None
+    with span("move"):
+        move(swarm, du, dv, idx, max_step)
+    swarm.tick += 1
+
+    if not sleeping:
+        return {"awake": n, "settled": 0, "skipped": 0, "converged": False}
+    moved = np.sqrt(((swarm.uv[idx] - previous)**2).sum(axis=1)) * field.size
+    swarm.calm[idx] = np.where(moved < sleep_threshold, swarm.calm[idx] + 1, 0)
+    if force is not None: # Remember the force each new sleeper settled under
+        asleep = idx[swarm.calm[idx] == sleep_ticks]
+        swarm.rest_force[asleep] = force[asleep]
+    settled = int(np.count_nonzero(swarm.calm >= sleep_ticks))
+    return {"awake": int(idx.size), "settled": settled, "skipped": n - int(idx.size),
+            "converged": settled >= converge_fraction * n}
@@ -0,0 +1,216 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+Headless batch runner for the agent simulation. Advances N ticks in a tight
+loop outside Grasshopper, writes compact .npz checkpoints of the swarm state
+(uv, velocity, age, RNG state) at intervals and resumes bit-identically from
+any checkpoint. Records settled agents and skipped updates for every tick
+and reports ticks per second when done.
+
+Usage:
+    python batch_runner.py --ticks 1000 --num-agents 500 --checkpoint-every 100
+    python batch_runner.py --resume checkpoints/tick_000500.npz --ticks 1000
+    python batch_runner.py --ticks 1000 --output final_state.npz
+    python batch_runner.py --ticks 1000 --profile profile.json
+    python batch_runner.py --ticks 1000 --sleep-threshold 0.001 --stats ticks.csv
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from profiling import Profiler
+from surface_field import SurfaceField
+
+from agent_swarm import HeightField, Swarm, build_swarm, tick
+from agent_output import save_arrays, swarm_arrays
+
+# --------------------------------------------------------------------------
+# Run configuration and field generation (shared/surface_field.py)
+# --------------------------------------------------------------------------
+DEFAULT_CONFIG = {
+    "divU": 50, "divV": 50, # Heightmap resolution
+    "surface_size": 20.0, # World edge length of the base surface
+    "amplitude": 1.0, "frequency": 3.5, "phase": 1.0, # Variation A
+    "num_agents": 20,
+    "seed": 42,
+    "slope_weight": 1.0,
+    "curvature_weight": 1.0,
+    "du": 0.01, "dv": 0.01, # Fixed step sizes, as in Agent.move
+    "jitter": 0.0, # Std. deviation of random velocity perturbation per tick
+    "separation_weight": 0.0, "cohesion_weight": 0.0, # Agent-agent forces, off by default
+    "neighbour_radius": 0.05, # Interaction radius in normalized UV units
+    "adaptive": 0, "cfl": 0.5, # 1 = bound each step to `cfl` heightmap cells
+    "sleep_threshold": 0.0, # Displacement per tick (world units) counted as settled, 0 disables sleeping
+    "sleep_ticks": 10, # Ticks below the threshold before an agent sleeps
+    "converge_fraction": 1.0, # Fraction of sleeping agents at which the run stops
+}
+
+TICK_KEYS = ("slope_weight", "curvature_weight", "du", "dv", "jitter",
+             "separation_weight", "cohesion_weight", "neighbour_radius",
+             "adaptive", "cfl", "sleep_threshold", "sleep_ticks", "converge_fraction")
+
+def tick_kwargs(config): # Keyword arguments for agent_swarm.tick() from a run configuration
+    kwargs = {key: config[key] for key in TICK_KEYS}
+    kwargs["adaptive"] = bool(kwargs["adaptive"])
+    return kwargs
+
+def build_field(config): # Heightmap field from a run configuration
+    surface = SurfaceField.from_parameters(config["divU"], config["divV"], config["amplitude"],
+                                           config["frequency"], config["phase"]) # Same engine as surface_generator.py
+    return HeightField(surface.heightmap, surface.U, surface.V, size=config["surface_size"],
+                       dH_du=surface.dH_du, dH_dv=surface.dH_dv) # Analytic slopes from the same pass
+
+# --------------------------------------------------------------------------
+# Checkpoints
+# --------------------------------------------------------------------------
+def save_checkpoint(path, swarm, config): # Compact snapshot of the swarm state
+    """Write uv, velocity, age, sleep counters and wake-up forces, tick, RNG state and config to a compressed .npz file."""
+    np.savez_compressed(
+        path,
+        uv=swarm.uv,
+        velocity=swarm.velocity,
+        age=swarm.age,
+        calm=swarm.calm,
+        rest_force=swarm.rest_force,
+        tick=np.int64(swarm.tick),
+        rng_state=np.array(json.dumps(swarm.rng_state())), # JSON keeps the 128-bit PCG64 state exact
+        config=np.array(json.dumps(config)),
+    )
+
+def load_checkpoint(path): # Restores swarm and configuration
+    """Return (swarm, config) restored from a checkpoint written by save_checkpoint()."""
+    with np.load(path) as data:
+        config = dict(DEFAULT_CONFIG, **json.loads(str(data["config"]))) # Older checkpoints lack newer keys
+        rng = np.random.default_rng()
+        swarm = Swarm(
+            uv=data["uv"].copy(),
+            velocity=data["velocity"].copy(),
+            age=data["age"].copy(),
+            rng=rng,
+            tick=int(data["tick"]),
+            calm=data["calm"].copy() if "calm" in data.files else None,
+            rest_force=data["rest_force"].copy() if "rest_force" in data.files else None,
+        )
+        swarm.set_rng_state(json.loads(str(data["rng_state"])))
+    return swarm, config
+
+def checkpoint_path(directory, tick_no): # Zero-padded names sort chronologically
+    return os.path.join(directory, "tick_%06d.npz" % tick_no)
+
+# --------------------------------------------------------------------------
+# Batch loop
+# --------------------------------------------------------------------------
+def run(swarm, field, config, ticks, checkpoint_dir=None, checkpoint_every=0, report_every=0, profiler=None,
+        history=None):
+    """
+    Advance the swarm until it has completed `ticks` steps in total, or until
+    it converges when sleeping is enabled. A Profiler, if given, records every tick;
+    a `history` list, if given, receives one {tick, awake, settled, skipped} dict per tick.
+    Returns (ticks_done, elapsed_seconds, skipped_agent_updates) for this call.
+    """
+    if checkpoint_dir and checkpoint_every > 0:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+    kwargs = tick_kwargs(config)
+    start_tick = swarm.tick
+    skipped = 0
+    t0 = time.perf_counter()
+    while swarm.tick < ticks:
+        if profiler is not None:
+            profiler.begin_tick(swarm.tick + 1)
+        stats = tick(swarm, field, profiler=profiler, **kwargs)
+        if profiler is not None:
+            profiler.count("agent updates", stats["awake"])
+            profiler.count("agent updates skipped", stats["skipped"])
+            profiler.end_tick()
+        skipped += stats["skipped"]
+        if history is not None:
+            history.append({"tick": swarm.tick, "awake": stats["awake"], "settled": stats["settled"],
+                            "skipped": stats["skipped"]})
+        if checkpoint_dir and checkpoint_every > 0 and swarm.tick % checkpoint_every == 0:
+            save_checkpoint(checkpoint_path(checkpoint_dir, swarm.tick), swarm, config)
+        if report_every > 0 and swarm.tick % report_every == 0:
+            print("tick %6d: %d settled, %d updates skipped" % (swarm.tick, stats["settled"], stats["skipped"]))
+        if stats["converged"]:
+            print("converged at tick %d" % swarm.tick)
+            break
+    elapsed = time.perf_counter() - t0
+    return swarm.tick - start_tick, elapsed, skipped
+
+HISTORY_COLUMNS = ("tick", "awake", "settled", "skipped")
+
+def save_history(path, history): # Per-tick sleep statistics as CSV
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(history)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless A4 agent simulation runner.")
+    parser.add_argument("--ticks", type=int, default=1000, help="total number of ticks to reach")
+    parser.add_argument("--resume", help="checkpoint .npz to resume from (its config is reused; CLI overrides win, with a warning)")
+    parser.add_argument("--checkpoint-dir", default="checkpoints")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="0 disables checkpoints")
+    parser.add_argument("--report-every", type=int, default=0, help="print settled/skipped counts every N ticks")
+    parser.add_argument("--profile", help="write a JSON profiling report (per run and per tick) to this path")
+    parser.add_argument("--profile-allocations", action="store_true", help="also track allocations (slower)")
+    parser.add_argument("--output", help="write final positions and velocity segments to this .npz")
+    parser.add_argument("--stats", help="write settled/skipped counts of every tick to this .csv")
+    for key, value in DEFAULT_CONFIG.items(): # Every config entry is overridable from the CLI
+        parser.add_argument("--" + key.replace("_", "-"), dest=key, type=type(value), default=None)
+    args = parser.parse_args(argv)
+
+    overrides = {k: getattr(args, k) for k in DEFAULT_CONFIG if getattr(args, k) is not None}
+    if args.resume:
+        swarm, config = load_checkpoint(args.resume)
+        changed = {k: v for k, v in overrides.items() if config[k] != v}
+        fixed = sorted(k for k in ("num_agents", "seed") if k in changed) # Baked into the restored swarm
+        if fixed:
+            parser.error("--%s cannot be changed when resuming" % ", --".join(k.replace("_", "-") for k in fixed))
+        if changed:
+            print("warning: overriding %s from the checkpoint config - the resumed run is no longer "
+                  "bit-identical to an uninterrupted one" % ", ".join("%s=%r" % kv for kv in sorted(changed.items())))
+        config.update(overrides)
+    else:
+        config = dict(DEFAULT_CONFIG)
+        config.update(overrides)
+        swarm = build_swarm(config["num_agents"], config["seed"])
+    field = build_field(config)
+
+    profiler = Profiler(enabled=True, track_allocations=args.profile_allocations,
+                        label="batch_runner") if args.profile else None
+    history = [] # Settled agents and skipped updates of every tick
+    done, elapsed, skipped = run(swarm, field, config, args.ticks, args.checkpoint_dir,
+                                 args.checkpoint_every, args.report_every, profiler, history)
+    rate = done / elapsed if elapsed > 0 else float("inf")
+    print("%d agents, %d ticks in %.3f s (%.1f ticks/s), now at tick %d"
+          % (len(swarm), done, elapsed, rate, swarm.tick))
+    if skipped:
+        saved = skipped / float(max(done * len(swarm), 1))
+        print("%d agent updates skipped by sleeping (%.1f%% of the work)" % (skipped, 100 * saved))
+    if history and config["sleep_threshold"] > 0:
+        print("%d of %d agents settled at tick %d" % (history[-1]["settled"], len(swarm), swarm.tick))
+    if args.stats:
+        save_history(args.stats, history)
+    if profiler is not None:
+        profiler.close()
+        profiler.to_json(args.profile)
+        print(profiler.summary())
+    if args.output:
+        save_arrays(args.output, *swarm_arrays(swarm, field))
+    return swarm
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+Benchmark for the UV spatial hash. Checks the hash against brute-force
+all-pairs distances for small swarms, then times one rebuild + radius query
++ force evaluation per tick for growing agent counts up to 100k. The radius
+shrinks with 1/sqrt(N) so the mean number of neighbours stays constant,
+which is the regime where the cost should grow near-linearly.
+
+Usage:
+    python bench_spatial_hash.py
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+import time
+
+import numpy as np
+
+from spatial_hash import UVSpatialHash, neighbour_forces
+
+NEIGHBOURS = 8.0 # Target mean neighbour count
+REPEATS = 5 # Best-of timing
+
+def radius_for(n): # Radius giving ~NEIGHBOURS neighbours on the unit square
+    return np.sqrt(NEIGHBOURS / (np.pi * n))
+
+def brute_force_pairs(uv, radius): # O(N^2) reference
+    d = uv[:, None, :] - uv[None, :, :]
+    dist2 = (d**2).sum(axis=2)
+    np.fill_diagonal(dist2, np.inf)
+    return np.nonzero(dist2 < radius**2)
+
+def check(n, seed=0):
+    """Spatial hash must return exactly the brute-force neighbour pairs."""
+    uv = np.random.default_rng(seed).random((n, 2))
+    r = radius_for(n)
+    i, j = UVSpatialHash(r).rebuild(uv).query_pairs()
+    bi, bj = brute_force_pairs(uv, r)
+    got = set(zip(i.tolist(), j.tolist()))
+    want = set(zip(bi.tolist(), bj.tolist()))
+    assert got == want, "hash/brute-force mismatch at N=%d" % n
+
+def time_tick(n, seed=0):
+    """Best-of wall time of rebuild + query + forces for N agents."""
+    uv = np.random.default_rng(seed).random((n, 2))
+    r = radius_for(n)
+    best = np.inf
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        grid = UVSpatialHash(r).rebuild(uv)
+        pairs = grid.query_pairs()
+        neighbour_forces(uv, pairs, r, 1.0, 0.5)
+        best = min(best, time.perf_counter() - t0)
+    return best, pairs[0].size
+
+def main():
+    for n in (10, 100, 1000):
+        check(n)
+    print("correctness: hash pairs == brute-force pairs")
+
+    print("%8s %10s %12s %14s" % ("agents", "pairs", "ms/tick", "us/agent"))
+    for n in (1000, 3000, 10000, 30000, 100000):
+        t, pairs = time_tick(n)
+        print("%8d %10d %12.2f %14.3f" % (n, pairs, t * 1e3, t * 1e6 / n))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+Parallel ensemble sweeps for the agent simulation. A grid of
+slope_weight x curvature_weight x num_agents x seed is spread over a process
+pool. The heightmap field (heightmap, gradients, curvature) is computed once
+in the parent and placed in shared memory; workers map it read-only instead
+of receiving a pickled copy per task. Every run reports summary metrics
+(coverage, coverage uniformity, mean displacement, convergence tick) into
+one results table.
+
+Usage:
+    python ensemble_runner.py --slope-weights 0.5,1,2 --curvature-weights 0,0.5,1 \\
+        --num-agents 20,200 --seeds 30,50,80 --ticks 500 --output ensemble.csv
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from agent_swarm import HeightField, build_swarm, tick
+from batch_runner import DEFAULT_CONFIG, build_field, tick_kwargs
+
+COVERAGE_CELLS = 10 # Coverage is measured on a COVERAGE_CELLS x COVERAGE_CELLS UV grid
+COLUMNS = ("slope_weight", "curvature_weight", "num_agents", "seed",
+           "coverage", "uniformity", "mean_displacement", "convergence_tick", "seconds")
+
+# --------------------------------------------------------------------------
+# Shared read-only field
+# --------------------------------------------------------------------------
+def share_field(field):
+    """Copy the field arrays into shared memory. Returns (blocks, specs)."""
+    blocks, specs = [], {}
+    for name, array in field.arrays().items():
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        blocks.append(shm)
+        specs[name] = (shm.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+_WORKER = {} # Per-process field and shared memory handles
+
+def _init_worker(specs, size): # Pool initializer: attach to the shared field once per process
+    arrays = {}
+    blocks = []
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        array.flags.writeable = False # Read-only view
+        arrays[name] = array
+        blocks.append(shm) # Keep handles alive for the lifetime of the worker
+    _WORKER["blocks"] = blocks
+    _WORKER["field"] = HeightField.from_arrays(arrays, size)
+
+# --------------------------------------------------------------------------
+# Metrics
+# --------------------------------------------------------------------------
+def coverage_metrics(uv, cells=COVERAGE_CELLS):
+    """
+    Fraction of occupied UV cells and coverage uniformity, defined as
+    1 / (1 + coefficient of variation of agents per cell), so 1 = perfectly even.
+    """
+    idx = np.minimum((uv * cells).astype(np.intp), cells - 1)
+    counts = np.bincount(idx[:, 1] * cells + idx[:, 0], minlength=cells * cells)
+    coverage = np.count_nonzero(counts) / counts.size
+    uniformity = 1.0 / (1.0 + counts.std() / counts.mean()) if counts.mean() > 0 else 0.0
+    return coverage, uniformity
+
+# --------------------------------------------------------------------------
+# One ensemble member
+# --------------------------------------------------------------------------
+def run_member(params, field=None):
+    """Simulate one parameter combination and return its row of the results table."""
+    field = field if field is not None else _WORKER["field"]
+    config = params["config"]
+    t0 = time.perf_counter()
+    swarm = build_swarm(params["num_agents"], params["seed"])
+    start = swarm.uv.copy()
+    kwargs = tick_kwargs(dict(config, slope_weight=params["slope_weight"],
+                              curvature_weight=params["curvature_weight"]))
+    convergence_tick = -1
+    for _ in range(params["ticks"]):
+        if tick(swarm, field, **kwargs)["converged"]:
+            convergence_tick = swarm.tick # Swarm-level convergence (see agent_swarm.tick)
+            break
+
+    coverage, uniformity = coverage_metrics(swarm.uv)
+    displacement = np.sqrt(((swarm.uv - start)**2).sum(axis=1)).mean() * field.size
+    return {
+        "slope_weight": params["slope_weight"],
+        "curvature_weight": params["curvature_weight"],
+        "num_agents": params["num_agents"],
+        "seed": params["seed"],
+        "coverage": coverage,
+        "uniformity": uniformity,
+        "mean_displacement": displacement,
+        "convergence_tick": convergence_tick,
+        "seconds": time.perf_counter() - t0,
+    }
+
+# --------------------------------------------------------------------------
+# Sweep
+# --------------------------------------------------------------------------
+def parameter_grid(slope_weights, curvature_weights, num_agents, seeds, ticks, config):
+    return [{"slope_weight": sw, "curvature_weight": cw, "num_agents": n, "seed": seed,
+             "ticks": ticks, "config": config}
+            for sw, cw, n, seed in itertools.product(slope_weights, curvature_weights, num_agents, seeds)]
+
+def run_ensemble(grid, config, workers=None):
+    """Run every grid entry on a process pool sharing one field. Returns rows in grid order."""
+    field = build_field(config)
+    if workers == 1: # Serial path, handy for debugging
+        return [run_member(params, field) for params in grid]
+
+    blocks, specs = share_field(field)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(specs, field.size)) as pool:
+            return list(pool.map(run_member, grid))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+def write_table(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+def _floats(text):
+    return [float(x) for x in text.split(",")]
+
+def _ints(text):
+    return [int(x) for x in text.split(",")]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel A4 parameter sweep.")
+    parser.add_argument("--slope-weights", type=_floats, default=[0.5, 1.0, 2.0])
+    parser.add_argument("--curvature-weights", type=_floats, default=[0.0, 0.5, 1.0])
+    parser.add_argument("--num-agents", type=_ints, default=[20])
+    parser.add_argument("--seeds", type=_ints, default=[30, 50, 80])
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="per-tick displacement (world units) counted as settled")
+    parser.add_argument("--sleep-ticks", type=int, default=DEFAULT_CONFIG["sleep_ticks"])
+    parser.add_argument("--adaptive", type=int, default=DEFAULT_CONFIG["adaptive"], help="1 = CFL-bounded adaptive steps")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--amplitude", type=float, default=DEFAULT_CONFIG["amplitude"])
+    parser.add_argument("--frequency", type=float, default=DEFAULT_CONFIG["frequency"])
+    parser.add_argument("--phase", type=float, default=DEFAULT_CONFIG["phase"])
+    parser.add_argument("--output", default="ensemble.csv")
+    args = parser.parse_args(argv)
+
+    config = dict(DEFAULT_CONFIG, amplitude=args.amplitude, frequency=args.frequency, phase=args.phase,
+                  sleep_threshold=args.tolerance, sleep_ticks=args.sleep_ticks, adaptive=args.adaptive)
+    grid = parameter_grid(args.slope_weights, args.curvature_weights, args.num_agents,
+                          args.seeds, args.ticks, config)
+    t0 = time.perf_counter()
+    rows = run_ensemble(grid, config, args.workers)
+    write_table(args.output, rows)
+
+    print(" ".join("%12s" % c[:12] for c in COLUMNS))
+    for row in rows:
+        print(" ".join("%12.4g" % row[c] for c in COLUMNS))
+    print("%d runs in %.2f s -> %s" % (len(rows), time.perf_counter() - t0, args.output))
+    return rows
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+Python replacement for the Delaunay step in agent_panelization.gh. Keeps a
+Delaunay triangulation of the agent UV positions (plus its Voronoi dual)
+and updates it incrementally as agents move instead of re-triangulating
+from scratch every tick:
+  - agents whose move keeps their surrounding triangles valid stay in place
+    and only the nearby edges are re-checked with Lawson edge flips,
+  - agents that jump across an edge are relocated (removed from the
+    triangulation, then re-inserted at their new position).
+Vertices and Voronoi centres are mapped back to 3D through the HeightField.
+
+Usage:
+    python panelization.py --num-agents 500 --ticks 50
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+import argparse
+import time
+
+import numpy as np
+
+# --------------------------------------------------------------------------
+# Geometric predicates
+# --------------------------------------------------------------------------
+EPS = 1e-12 # Tolerance for orientation / incircle tests
+DUPLICATE_EPS2 = 1e-18 # Squared distance under which two agents count as one vertex
+SUPER = [(-1.0e3, -1.0e3), (1.0e3, -1.0e3), (0.5, 1.0e3)] # Super triangle enclosing the UV square
+
+def orient(a, b, c): # > 0 if a, b, c are counter-clockwise
+    return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0])
+
+def incircle(a, b, c, d): # > 0 if d lies inside the circumcircle of CCW triangle a, b, c
+    adx, ady = a[0]-d[0], a[1]-d[1]
+    bdx, bdy = b[0]-d[0], b[1]-d[1]
+    cdx, cdy = c[0]-d[0], c[1]-d[1]
+    ad = adx*adx + ady*ady
+    bd = bdx*bdx + bdy*bdy
+    cd = cdx*cdx + cdy*cdy
+    return (adx*(bdy*cd - bd*cdy)
+            - ady*(bdx*cd - bd*cdx)
+            + ad*(bdx*cdy - bdy*cdx))
+
+def orient_vec(a, b, c): # Vectorized orient() over (M, 2) arrays
+    return (b[:, 0]-a[:, 0])*(c[:, 1]-a[:, 1]) - (b[:, 1]-a[:, 1])*(c[:, 0]-a[:, 0])
+
+def incircle_vec(a, b, c, d): # Vectorized incircle() over (M, 2) arrays
+    ad_, bd_, cd_ = a - d, b - d, c - d
+    ad = (ad_**2).sum(1)
+    bd = (bd_**2).sum(1)
+    cd = (cd_**2).sum(1)
+    return (ad_[:, 0]*(bd_[:, 1]*cd - bd*cd_[:, 1])
+            - ad_[:, 1]*(bd_[:, 0]*cd - bd*cd_[:, 0])
+            + ad*(bd_[:, 0]*cd_[:, 1] - bd_[:, 1]*cd_[:, 0]))
+
+def circumcenters(P, faces): # Vectorized circumcentres of (F, 3) triangles
+    a, b, c = P[faces[:, 0]], P[faces[:, 1]], P[faces[:, 2]]
+    d = 2.0 * (a[:, 0]*(b[:, 1]-c[:, 1]) + b[:, 0]*(c[:, 1]-a[:, 1]) + c[:, 0]*(a[:, 1]-b[:, 1]))
+    a2, b2, c2 = (a**2).sum(1), (b**2).sum(1), (c**2).sum(1)
+    ux = (a2*(b[:, 1]-c[:, 1]) + b2*(c[:, 1]-a[:, 1]) + c2*(a[:, 1]-b[:, 1])) / d
+    uy = (a2*(c[:, 0]-b[:, 0]) + b2*(a[:, 0]-c[:, 0]) + c2*(b[:, 0]-a[:, 0])) / d
+    return np.column_stack((ux, uy))
+
+# --------------------------------------------------------------------------
+# Incremental Delaunay triangulation
+# --------------------------------------------------------------------------
+class IncrementalDelaunay:
+    """
+    Delaunay triangulation of N agent UVs kept valid under point motion.
+    Agents are vertices 0..N-1, the super triangle uses vertices N..N+2.
+    Triangles are stored CCW in a dict together with a directed-edge index.
+    """
+    def __init__(self, uv):
+        uv = np.asarray(uv, dtype=float)
+        self.n = uv.shape[0]
+        self.uv = uv.copy() # Positions the triangulation currently represents
+        self.pts = [tuple(p) for p in uv.tolist()] + list(SUPER)
+        self.tris = {} # Triangle id -> (a, b, c) CCW
+        self.edge_tri = {} # Directed edge (a, b) -> id of the triangle containing it
+        self.vert_tris = [set() for _ in range(self.n + 3)] # Vertex -> incident triangle ids
+        self.active = [False] * self.n # False for agents sitting on top of another agent
+        self._next_id = 0
+        self._last = self._add(self.n, self.n + 1, self.n + 2) # Walk start for point location
+        self.flips = 0
+
+        for v in range(self.n):
+            self._insert(v)
+
+    # -- bookkeeping -------------------------------------------------------
+    def _add(self, a, b, c):
+        t = self._next_id
+        self._next_id += 1
+        self.tris[t] = (a, b, c)
+        self.edge_tri[(a, b)] = t
+        self.edge_tri[(b, c)] = t
+        self.edge_tri[(c, a)] = t
+        for v in (a, b, c):
+            self.vert_tris[v].add(t)
+        self._last = t
+        return t
+
+    def _delete(self, t):
+        a, b, c = self.tris.pop(t)
+        for e in ((a, b), (b, c), (c, a)):
+            if self.edge_tri.get(e) == t:
+                del self.edge_tri[e]
+        for v in (a, b, c):
+            self.vert_tris[v].discard(t)
+
+    # -- point location ----------------------------------------------------
+    def _locate(self, p):
+        """Walk from the last touched triangle towards the one containing p."""
+        t = self._last if self._last in self.tris else next(iter(self.tris))
+        pts = self.pts
+        for _ in range(len(self.tris) + 1):
+            a, b, c = self.tris[t]
+            for u, w in ((a, b), (b, c), (c, a)):
+                if orient(pts[u], pts[w], p) < 0: # p is on the far side of edge u-w
+                    nxt = self.edge_tri.get((w, u))
+                    if nxt is not None:
+                        t = nxt
+                        break
+            else:
+                return t
+        for t, (a, b, c) in self.tris.items(): # Fallback scan if the walk cycles on degenerate input
+            if min(orient(pts[a], pts[b], p), orient(pts[b], pts[c], p), orient(pts[c], pts[a], p)) >= 0:
+                return t
+        raise RuntimeError("point (%g, %g) lies outside the super triangle" % p)
+
+    # -- insertion (Bowyer-Watson cavity) ----------------------------------
+    def _insert(self, v):
+        """Insert vertex v at self.pts[v]; marks v inactive if it duplicates a vertex."""
+        pts = self.pts
+        p = pts[v]
+        t0 = self._locate(p)
+        for w in self.tris[t0]:
+            q = pts[w]
+            if (q[0]-p[0])**2 + (q[1]-p[1])**2 < DUPLICATE_EPS2:
+                self.active[v] = False
+                return
+
+        # Grow the cavity of triangles whose circumcircle contains p
+        cavity = {t0}
+        stack = [t0]
+        while stack:
+            t = stack.pop()
+            a, b, c = self.tris[t]
+            for u, w in ((a, b), (b, c), (c, a)):
+                nb = self.edge_tri.get((w, u))
+                if nb is None or nb in cavity:
+                    continue
+                x, y, z = self.tris[nb]
+                if incircle(pts[x], pts[y], pts[z], p) > 0:
+                    cavity.add(nb)
+                    stack.append(nb)
+
+        # The cavity must be star-shaped from p; absorb neighbours that break this (round-off)
+        while True:
+            boundary = []
+            bad = None
+            for t in cavity:
+                a, b, c = self.tris[t]
+                for u, w in ((a, b), (b, c), (c, a)):
+                    nb = self.edge_tri.get((w, u))
+                    if nb in cavity:
+                        continue
+                    if orient(pts[u], pts[w], p) <= 0 and nb is not None:
+                        bad = nb
+                        break
+                    boundary.append((u, w))
+                if bad is not None:
+                    break
+            if bad is None:
+                break
+            cavity.add(bad)
+
+        for t in cavity:
+            self._delete(t)
+        for u, w in boundary:
+            self._add(u, w, v)
+        self.active[v] = True
+
+    # -- removal (Delaunay ear clipping of the star polygon) ---------------
+    def _remove(self, v):
+        """Remove vertex v and re-triangulate the hole it leaves."""
+        pts = self.pts
+        link = {}
+        for t in list(self.vert_tris[v]):
+            a, b, c = self.tris[t]
+            while a != v: # Rotate so the triangle reads (v, a, b)
+                a, b, c = b, c, a
+            link[b] = c
+            self._delete(t)
+        self.active[v] = False
+
+        start = next(iter(link))
+        poly = [start]
+        while link[poly[-1]] != start:
+            poly.append(link[poly[-1]])
+
+        queue = []
+        while len(poly) > 3:
+            m = len(poly)
+            ear = None
+            for i in range(m):
+                a, b, c = poly[i - 1], poly[i], poly[(i + 1) % m]
+                if orient(pts[a], pts[b], pts[c]) <= EPS:
+                    continue
+                others = [pts[w] for w in poly if w not in (a, b, c)]
+                if all(incircle(pts[a], pts[b], pts[c], q) <= EPS for q in others):
+                    ear = i # Delaunay ear: no other hole vertex inside its circumcircle
+                    break
+                if ear is None and all(min(orient(pts[a], pts[b], q), orient(pts[b], pts[c], q),
+                                           orient(pts[c], pts[a], q)) < 0 for q in others):
+                    ear = -(i + 1) # Valid but not Delaunay ear, fixed later by flips
+            if ear is None:
+                ear = 0
+            i = ear if ear >= 0 else -ear - 1
+            a, b, c = poly[i - 1], poly[i], poly[(i + 1) % m]
+            self._add(a, b, c)
+            queue.append((a, c))
+            del poly[i]
+        self._add(poly[0], poly[1], poly[2])
+        self._legalize(queue)
+
+    # -- Lawson edge flips -------------------------------------------------
+    def _legalize(self, queue):
+        """Flip edges from the queue (and their neighbours) until locally Delaunay."""
+        pts = self.pts
+        budget = 10 * len(self.tris) + 100 # Guards against flip cycles on cocircular points
+        while queue and budget > 0:
+            a, b = queue.pop()
+            t1 = self.edge_tri.get((a, b))
+            t2 = self.edge_tri.get((b, a))
+            if t1 is None or t2 is None:
+                continue
+            c = next(x for x in self.tris[t1] if x != a and x != b) # (a, b, c) is CCW by construction
+            d = next(x for x in self.tris[t2] if x != a and x != b)
+            if incircle(pts[a], pts[b], pts[c], pts[d]) <= EPS:
+                continue
+            if orient(pts[a], pts[d], pts[c]) <= EPS or orient(pts[b], pts[c], pts[d]) <= EPS:
+                continue # Quad is not convex, edge cannot be flipped
+            self._delete(t1)
+            self._delete(t2)
+            self._add(a, d, c)
+            self._add(b, c, d)
+            self.flips += 1
+            budget -= 1
+            queue.extend(((a, d), (d, b), (b, c), (c, a)))
+
+    def _edge_quads(self, T):
+        """
+        For every interior edge of the (M, 3) triangle array return vertex arrays
+        A, B (the edge, CCW in its first triangle), C, D (the opposite vertices)
+        Each edge is listed once.
+        """
+        m = len(self.pts)
+        A = T.ravel()
+        B = np.roll(T, -1, axis=1).ravel()
+        C = np.roll(T, -2, axis=1).ravel()
+        key = A * m + B
+        twin = B * m + A
+        order = np.argsort(key)
+        pos = np.searchsorted(key, twin, sorter=order)
+        pos = np.minimum(pos, key.size - 1)
+        match = order[pos]
+        found = (key[match] == twin) & (A < B) # Interior edge, counted from one side only
+        src = np.nonzero(found)[0]
+        return A[src], B[src], C[src], C[match[src]]
+
+    # -- per-tick update ---------------------------------------------------
+    def update(self, uv):
+        """
+        Move vertices to new (N, 2) UV positions and repair the triangulation.
+        Returns a dict with the number of moved, flipped and relocated agents.
+        """
+        uv = np.asarray(uv, dtype=float)
+        pts = self.pts
+        flips0 = self.flips
+        moved = np.any(uv != self.uv, axis=1)
+        active = np.array(self.active, dtype=bool)
+        for v in np.nonzero(moved & ~active)[0].tolist(): # Inactive agents just take their new position
+            pts[v] = (float(uv[v, 0]), float(uv[v, 1]))
+
+        T = np.array(list(self.tris.values()), dtype=np.intp).reshape(-1, 3)
+        P = np.array(pts, dtype=float)
+
+        # 1) Tentatively move all active agents; revert those that would invert a triangle
+        movable = moved & active
+        keep = np.zeros(self.n + 3, dtype=bool)
+        keep[:self.n] = movable
+        while True:
+            P_new = P.copy()
+            P_new[keep] = uv[keep[:self.n]]
+            inverted = orient_vec(P_new[T[:, 0]], P_new[T[:, 1]], P_new[T[:, 2]]) <= EPS
+            culprits = np.unique(T[inverted])
+            culprits = culprits[keep[culprits]]
+            if culprits.size == 0:
+                break
+            keep[culprits] = False # These agents crossed an edge and get relocated instead
+        relocate = np.nonzero(movable & ~keep[:self.n])[0].tolist()
+        for v in np.nonzero(keep)[0].tolist():
+            pts[v] = (float(uv[v, 0]), float(uv[v, 1]))
+
+        # 2) Vectorized local Delaunay test over all interior edges, flip only the illegal ones
+        queue = []
+        if keep.any():
+            A, B, C, D = self._edge_quads(T)
+            illegal = incircle_vec(P_new[A], P_new[B], P_new[C], P_new[D]) > EPS
+            queue = list(zip(A[illegal].tolist(), B[illegal].tolist()))
+        self._legalize(queue)
+
+        # 3) Relocate agents that crossed an edge, then retry duplicates
+        for v in relocate:
+            self._remove(v)
+            pts[v] = (float(uv[v, 0]), float(uv[v, 1]))
+            self._insert(v)
+        for v in [v for v in range(self.n) if not self.active[v]]:
+            self._insert(v)
+
+        self.uv = uv.copy()
+        return {"moved": int(moved.sum()), "flips": self.flips - flips0, "relocated": len(relocate)}
+
+    # -- outputs -----------------------------------------------------------
+    def faces(self):
+        """(F, 3) vertex indices of all triangles not touching the super triangle."""
+        n = self.n
+        faces = [t for t in self.tris.values() if max(t) < n]
+        return np.array(faces, dtype=np.intp).reshape(-1, 3)
+
+    def voronoi(self, faces=None):
+        """
+        Voronoi dual: (F, 2) circumcentres in UV space and (E, 2) index pairs of
+        faces sharing an edge (each pair is one Voronoi edge).
+        """
+        if faces is None:
+            faces = self.faces()
+        centers = circumcenters(np.asarray(self.pts), faces)
+        face_of = {}
+        for f, (a, b, c) in enumerate(faces.tolist()):
+            for e in ((a, b), (b, c), (c, a)):
+                face_of[e] = f
+        edges = [(f, face_of[(b, a)]) for (a, b), f in face_of.items() if a < b and (b, a) in face_of]
+        return centers, np.array(edges, dtype=np.intp).reshape(-1, 2)
+
+    def is_delaunay(self):
+        """Brute-force empty-circumcircle check (for testing on small swarms)."""
+        P = [self.pts[v] for v in range(self.n) if self.active[v]]
+        for a, b, c in self.tris.values():
+            if max(a, b, c) >= self.n:
+                continue
+            for q in P:
+                if incircle(self.pts[a], self.pts[b], self.pts[c], q) > 1e-9:
+                    return False
+        return True
+
+# --------------------------------------------------------------------------
+# Panelization stage
+# --------------------------------------------------------------------------
+class Panelizer:
+    """Delaunay panels + Voronoi dual of the swarm, mapped to 3D through a HeightField."""
+    def __init__(self, uv, field):
+        self.field = field
+        self.delaunay = IncrementalDelaunay(uv)
+        self.last_stats = {}
+
+    def update(self, uv): # Called once per tick after the swarm moved
+        t0 = time.perf_counter()
+        stats = self.delaunay.update(uv)
+        stats["seconds"] = time.perf_counter() - t0
+        self.last_stats = stats
+        return stats
+
+    def mesh(self):
+        """Return (vertices (N, 3), faces (F, 3)) of the Delaunay panels."""
+        return self.field.points(self.delaunay.uv), self.delaunay.faces()
+
+    def voronoi(self):
+        """Return (voronoi vertices (F, 3), voronoi edges (E, 2))."""
+        centers, edges = self.delaunay.voronoi()
+        return self.field.points(np.clip(centers, 0.0, 1.0)), edges
+
+# --------------------------------------------------------------------------
+# Cost report: incremental update vs full rebuild
+# --------------------------------------------------------------------------
+def compare_update_cost(swarm, field, ticks, tick_kwargs=None):
+    """Advance the swarm and time incremental updates against full rebuilds per tick."""
+    from agent_swarm import tick
+
+    tick_kwargs = tick_kwargs or {}
+    panels = Panelizer(swarm.uv, field)
+    rows = []
+    for _ in range(ticks):
+        tick(swarm, field, **tick_kwargs)
+        stats = panels.update(swarm.uv)
+        t0 = time.perf_counter()
+        IncrementalDelaunay(swarm.uv) # Full rebuild for comparison
+        stats["rebuild_seconds"] = time.perf_counter() - t0
+        rows.append(stats)
+    return panels, rows
+
+def main(argv=None):
+    from batch_runner import DEFAULT_CONFIG, build_field, tick_kwargs
+    from agent_swarm import build_swarm
+
+    parser = argparse.ArgumentParser(description="Incremental Delaunay panelization report.")
+    parser.add_argument("--num-agents", type=int, default=500)
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    config = dict(DEFAULT_CONFIG)
+    field = build_field(config)
+    swarm = build_swarm(args.num_agents, args.seed)
+    panels, rows = compare_update_cost(swarm, field, args.ticks, tick_kwargs(config))
+
+    inc = np.mean([r["seconds"] for r in rows]) * 1e3
+    full = np.mean([r["rebuild_seconds"] for r in rows]) * 1e3
+    print("%d agents, %d ticks" % (args.num_agents, args.ticks))
+    print("  incremental: %.2f ms/tick (%.1f flips, %.1f relocations per tick)"
+          % (inc, np.mean([r["flips"] for r in rows]), np.mean([r["relocated"] for r in rows])))
+    print("  full rebuild: %.2f ms/tick (%.1fx)" % (full, full / inc if inc > 0 else float("inf")))
+    vertices, faces = panels.mesh()
+    print("  %d vertices, %d faces" % (len(vertices), len(faces)))
+
+if __name__ == "__main__":
+    main()
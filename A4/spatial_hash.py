@@ -0,0 +1,125 @@
+"""
+Assignment 4: Agent-Based Model for Surface Panelization
+Author: Laurids Ejersbo
+
+Description:
+Uniform-grid spatial hash over normalized UV space for agent-agent
+interaction. The grid is rebuilt every tick with a radix sort over cell ids
+(cell counts and slot offsets from a histogram + prefix sum), and radius queries are answered for all agents at once by scanning the
+3x3 block of cells around each agent. Cost is O(N + pairs) per tick instead
+of the O(N^2) all-pairs comparison.
+"""
+
+# --------------------------------------------------------------------------
+# Imports
+# --------------------------------------------------------------------------
+import numpy as np
+
+# --------------------------------------------------------------------------
+# Spatial hash
+# --------------------------------------------------------------------------
+class UVSpatialHash:
+    """Uniform grid over [0,1]^2 with cell size >= the query radius."""
+    def __init__(self, radius):
+        self.radius = float(radius)
+        self.n_cells = max(1, int(1.0 / self.radius)) # Cells per side - each cell is at least one radius wide
+        self.cell_size = 1.0 / self.n_cells
+        self.uv = None
+        self.cell_u = None
+        self.cell_v = None
+        self.order = None # Agent indices sorted by cell id
+        self.cell_start = None # First slot in `order` for every cell
+        self.cell_count = None # Number of agents in every cell
+
+    def rebuild(self, uv): # Called once per tick
+        """
+        Bin (N, 2) normalized UVs into cells. Cell ids are cast to the smallest
+        unsigned dtype that holds them, so NumPy's stable argsort runs as an O(N)
+        radix sort (uint8/uint16; grids above 256x256 cells fall back to timsort).
+        """
+        self.uv = uv
+        n = self.n_cells
+        self.cell_u = np.minimum((uv[:, 0] * n).astype(np.intp), n - 1) # u = 1.0 falls into the last cell
+        self.cell_v = np.minimum((uv[:, 1] * n).astype(np.intp), n - 1)
+        cell_id = self.cell_v * n + self.cell_u
+
+        # Histogram of cell ids -> prefix sum gives every cell's slot range in `order`
+        self.cell_count = np.bincount(cell_id, minlength=n * n)
+        self.cell_start = np.cumsum(self.cell_count) - self.cell_count
+
+        # Agents sorted by cell; rank within a cell follows agent order (stable)
+        if n * n <= 256:
+            cell_id = cell_id.astype(np.uint8) # Radix sort for 8/16-bit keys
+        elif n * n <= 65536:
+            cell_id = cell_id.astype(np.uint16)
+        self.order = np.argsort(cell_id, kind="stable")
+        return self
+
+    def query_pairs(self):
+        """
+        Return index arrays (i, j) of all ordered pairs with |uv_i - uv_j| < radius
+        and i != j. Every neighbour relation appears in both directions.
+        """
+        n = self.n_cells
+        agents = np.arange(self.uv.shape[0])
+        pair_i, pair_j = [], []
+        for dv in (-1, 0, 1):
+            for du in (-1, 0, 1): # 3x3 block of cells around each agent
+                nu = self.cell_u + du
+                nv = self.cell_v + dv
+                valid = (nu >= 0) & (nu < n) & (nv >= 0) & (nv < n)
+                src = agents[valid]
+                cell = nv[valid] * n + nu[valid]
+                count = self.cell_count[cell]
+                total = int(count.sum())
+                if total == 0:
+                    continue
+
+                # Expand every (agent, cell) into one candidate pair per agent in that cell
+                first = np.repeat(self.cell_start[cell], count)
+                offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+                pair_i.append(np.repeat(src, count))
+                pair_j.append(self.order[first + offset])
+
+        if not pair_i:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty
+        i = np.concatenate(pair_i)
+        j = np.concatenate(pair_j)
+
+        # Exact distance test on the candidates
+        d = self.uv[i] - self.uv[j]
+        keep = (i != j) & (d[:, 0]**2 + d[:, 1]**2 < self.radius**2)
+        return i[keep], j[keep]
+
+# --------------------------------------------------------------------------
+# Neighbour forces
+# --------------------------------------------------------------------------
+def neighbour_forces(uv, pairs, radius, separation_weight=1.0, cohesion_weight=0.0):
+    """
+    Separation and cohesion forces in UV space for every agent.
+    Separation pushes agents apart with a linear falloff to zero at `radius`;
+    cohesion pulls each agent towards the centroid of its neighbours.
+    """
+    i, j = pairs
+    n = uv.shape[0]
+    force = np.zeros((n, 2))
+    if i.size == 0:
+        return force
+
+    d = uv[i] - uv[j] # Vector from neighbour j to agent i
+    dist = np.sqrt(d[:, 0]**2 + d[:, 1]**2)
+
+    if separation_weight:
+        falloff = (1.0 - dist / radius) / np.maximum(dist, 1e-12) # Unit direction times falloff
+        for axis in (0, 1):
+            force[:, axis] += separation_weight * np.bincount(i, weights=d[:, axis] * falloff, minlength=n)
+
+    if cohesion_weight:
+        count = np.bincount(i, minlength=n)
+        has = count > 0
+        for axis in (0, 1):
+            centroid = np.bincount(i, weights=uv[j, axis], minlength=n)
+            force[has, axis] += cohesion_weight * (centroid[has] / count[has] - uv[has, axis])
+
+    return force
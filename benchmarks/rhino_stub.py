@@ -0,0 +1,411 @@
+"""
+Benchmarks: Local rhinoscriptsyntax / Rhino Stand-in
+Author: Laurids Ejersbo
+
+Description:
+Minimal pure-Python stand-in for the parts of rhinoscriptsyntax, Rhino,
+scriptcontext, Grasshopper and System that the assignment scripts call, so
+the Grasshopper scripts can be run and timed on machines without Rhino.
+
+Surfaces are analytic (plane, paraboloid) or bilinear point grids (what
+rs.AddSrfPtGrid returns here), so geometric results can be checked exactly.
+Only the calls the scripts actually use are implemented. The signatures
+follow rhinoscriptsyntax, so a wrong call fails here the same way it would
+in Rhino. Points and vectors are plain (x, y, z) tuples.
+
+Usage:
+    import rhino_stub
+    rhino_stub.install() # registers the stand-in modules in sys.modules
+"""
+
+# ---------------------------------------------------------------------------
+# IMPORTS
+# ---------------------------------------------------------------------------
+import math
+import sys
+import types
+
+# ---------------------------------------------------------------------------
+# VECTOR HELPERS
+# ---------------------------------------------------------------------------
+def _sub(a, b):
+    return (a[0]-b[0], a[1]-b[1], a[2]-b[2])
+
+def _add(a, b):
+    return (a[0]+b[0], a[1]+b[1], a[2]+b[2])
+
+def _scale(a, s):
+    return (a[0]*s, a[1]*s, a[2]*s)
+
+def _dot(a, b):
+    return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+def _cross(a, b):
+    return (a[1]*b[2]-a[2]*b[1], a[2]*b[0]-a[0]*b[2], a[0]*b[1]-a[1]*b[0])
+
+def _unit(a):
+    length = math.sqrt(_dot(a, a))
+    return _scale(a, 1.0 / length) if length > 0 else None
+
+# ---------------------------------------------------------------------------
+# Rhino.Geometry STAND-INS
+# ---------------------------------------------------------------------------
+class Point3d(tuple):
+    def __new__(cls, x, y, z):
+        return tuple.__new__(cls, (x, y, z))
+
+    X = property(lambda self: self[0])
+    Y = property(lambda self: self[1])
+    Z = property(lambda self: self[2])
+
+class Vector3d(Point3d):
+    pass
+
+class Interval:
+    def __init__(self, t0, t1):
+        self.T0 = t0
+        self.T1 = t1
+
+class Line:
+    def __init__(self, x0, y0, z0, x1, y1, z1):
+        self.From = (x0, y0, z0)
+        self.To = (x1, y1, z1)
+
+class PointCloud:
+    def __init__(self):
+        self.points = []
+
+    def AddRange(self, points):
+        self.points.extend(points)
+
+    @property
+    def Count(self):
+        return len(self.points)
+
+class _VertexList(list):
+    def Add(self, x, y, z):
+        self.append((x, y, z))
+
+class _FaceList(list):
+    def AddFace(self, *idx):
+        self.append(tuple(idx))
+
+class _NormalList(list):
+    def __init__(self, mesh):
+        super().__init__()
+        self.mesh = mesh
+
+    def ComputeNormals(self): # Area-weighted vertex normals
+        mesh = self.mesh
+        acc = [(0.0, 0.0, 0.0)] * len(mesh.Vertices)
+        for face in mesh.Faces:
+            p = [mesh.Vertices[i] for i in face]
+            n = _cross(_sub(p[1], p[0]), _sub(p[2], p[0]))
+            for i in face:
+                acc[i] = _add(acc[i], n)
+        self[:] = [_unit(n) or (0.0, 0.0, 1.0) for n in acc]
+        return True
+
+class Mesh:
+    def __init__(self):
+        self.Vertices = _VertexList()
+        self.Faces = _FaceList()
+        self.Normals = _NormalList(self)
+
+    def Compact(self):
+        return True
+
+class Surface:
+    """Base class: subclasses implement point_at(u, v) over their domain."""
+    domain_u = (0.0, 1.0)
+    domain_v = (0.0, 1.0)
+    h = 1e-5 # Finite-difference step (fraction of the domain)
+
+    def point_at(self, u, v):
+        raise NotImplementedError
+
+    def derivatives(self, u, v):
+        hu = self.h * (self.domain_u[1] - self.domain_u[0])
+        hv = self.h * (self.domain_v[1] - self.domain_v[0])
+        su = _scale(_sub(self.point_at(u + hu, v), self.point_at(u - hu, v)), 0.5 / hu)
+        sv = _scale(_sub(self.point_at(u, v + hv), self.point_at(u, v - hv)), 0.5 / hv)
+        return su, sv
+
+    def normal_at(self, u, v):
+        su, sv = self.derivatives(u, v)
+        return _unit(_cross(su, sv))
+
+    def curvature_at(self, u, v):
+        """(k1, k2) principal curvatures from the first and second fundamental forms."""
+        hu = 1e-3 * (self.domain_u[1] - self.domain_u[0])
+        hv = 1e-3 * (self.domain_v[1] - self.domain_v[0])
+        p = self.point_at(u, v)
+        suu = _scale(_add(_sub(self.point_at(u + hu, v), _scale(p, 2)), self.point_at(u - hu, v)), 1 / hu**2)
+        svv = _scale(_add(_sub(self.point_at(u, v + hv), _scale(p, 2)), self.point_at(u, v - hv)), 1 / hv**2)
+        suv = _scale(_add(_sub(self.point_at(u + hu, v + hv), self.point_at(u + hu, v - hv)),
+                          _sub(self.point_at(u - hu, v - hv), self.point_at(u - hu, v + hv))), 0.25 / (hu * hv))
+        su, sv = self.derivatives(u, v)
+        n = _unit(_cross(su, sv))
+        E, F, G = _dot(su, su), _dot(su, sv), _dot(sv, sv)
+        L, M, N = _dot(suu, n), _dot(suv, n), _dot(svv, n)
+        det = E*G - F*F
+        K = (L*N - M*M) / det
+        H = (E*N - 2*F*M + G*L) / (2 * det)
+        root = math.sqrt(max(H*H - K, 0.0))
+        return H + root, H - root
+
+    def closest_uv(self, point):
+        """Vertical projection onto the surface (exact for graph surfaces z = f(x, y))."""
+        raise NotImplementedError
+
+    # RhinoCommon Surface methods (used directly by shared/surface_field.py)
+    def Domain(self, direction):
+        return Interval(*(self.domain_u if direction == 0 else self.domain_v))
+
+    def PointAt(self, u, v):
+        return Point3d(*self.point_at(u, v))
+
+    def NormalAt(self, u, v):
+        return Vector3d(*(self.normal_at(u, v) or (0.0, 0.0, 0.0))) # Zero vector when degenerate
+
+class PlaneSurface(Surface):
+    """Flat square [0, size] x [0, size] at z = 0 with domain [0, size]^2."""
+    def __init__(self, size=20.0):
+        self.size = float(size)
+        self.domain_u = (0.0, self.size)
+        self.domain_v = (0.0, self.size)
+
+    def point_at(self, u, v):
+        return (u, v, 0.0)
+
+    def normal_at(self, u, v):
+        return (0.0, 0.0, 1.0)
+
+    def curvature_at(self, u, v):
+        return 0.0, 0.0
+
+    def closest_uv(self, point):
+        return (min(max(point[0], 0.0), self.size), min(max(point[1], 0.0), self.size))
+
+class ParaboloidSurface(Surface):
+    """z = c * ((x - s/2)^2 + (y - s/2)^2) over [0, s]^2; both curvatures are 2c at the apex."""
+    def __init__(self, size=20.0, c=0.02):
+        self.size = float(size)
+        self.c = float(c)
+        self.domain_u = (0.0, self.size)
+        self.domain_v = (0.0, self.size)
+
+    def point_at(self, u, v):
+        h = self.size / 2
+        return (u, v, self.c * ((u - h)**2 + (v - h)**2))
+
+    def normal_at(self, u, v):
+        h = self.size / 2
+        return _unit((-2*self.c*(u - h), -2*self.c*(v - h), 1.0))
+
+    def closest_uv(self, point):
+        return (min(max(point[0], 0.0), self.size), min(max(point[1], 0.0), self.size))
+
+class GridSurface(Surface):
+    """Bilinear surface through a (rows x cols) point grid, domain [0,1]^2 (u along columns)."""
+    def __init__(self, rows, cols, points):
+        self.rows, self.cols = rows, cols
+        self.grid = [points[i*cols:(i+1)*cols] for i in range(rows)]
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        self.bounds = (min(xs), max(xs), min(ys), max(ys))
+
+    def point_at(self, u, v):
+        x = min(max(u, 0.0), 1.0) * (self.cols - 1)
+        y = min(max(v, 0.0), 1.0) * (self.rows - 1)
+        j = min(int(x), self.cols - 2)
+        i = min(int(y), self.rows - 2)
+        fx, fy = x - j, y - i
+        g = self.grid
+        a = _add(_scale(g[i][j], 1 - fx), _scale(g[i][j+1], fx))
+        b = _add(_scale(g[i+1][j], 1 - fx), _scale(g[i+1][j+1], fx))
+        return _add(_scale(a, 1 - fy), _scale(b, fy))
+
+    def closest_uv(self, point): # Inverse of the (rectilinear) xy layout of the grid
+        x0, x1, y0, y1 = self.bounds
+        u = (point[0] - x0) / (x1 - x0) if x1 > x0 else 0.0
+        v = (point[1] - y0) / (y1 - y0) if y1 > y0 else 0.0
+        return (min(max(u, 0.0), 1.0), min(max(v, 0.0), 1.0))
+
+    def edge_curves(self):
+        g = self.grid
+        return [Polyline(list(g[0])), Polyline([row[-1] for row in g]),
+                Polyline(list(reversed(g[-1]))), Polyline([row[0] for row in reversed(g)])]
+
+class Polyline:
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points]
+
+# ---------------------------------------------------------------------------
+# rhinoscriptsyntax STAND-IN
+# ---------------------------------------------------------------------------
+def SurfaceDomain(surface_id, direction):
+    return surface_id.domain_u if direction == 0 else surface_id.domain_v
+
+def EvaluateSurface(surface_id, u, v):
+    return surface_id.point_at(u, v)
+
+def SurfaceNormal(surface_id, uv_parameter):
+    return surface_id.normal_at(uv_parameter[0], uv_parameter[1])
+
+def SurfaceClosestPoint(surface_id, test_point):
+    return surface_id.closest_uv(test_point)
+
+def SurfaceCurvature(surface_id, parameter):
+    u, v = parameter
+    k1, k2 = surface_id.curvature_at(u, v)
+    p = surface_id.point_at(u, v)
+    n = surface_id.normal_at(u, v)
+    return (p, n, k1, None, k2, None, k1 * k2, (k1 + k2) / 2) # Same layout as rs: indices 2 and 4 are k1/k2
+
+def VectorUnitize(vector):
+    return _unit(vector)
+
+def VectorScale(vector, scale):
+    return _scale(vector, scale)
+
+def VectorAdd(vector1, vector2):
+    return _add(vector1, vector2)
+
+def VectorCreate(to_point, from_point):
+    return _sub(to_point, from_point)
+
+def PointAdd(point1, point2):
+    return _add(point1, point2)
+
+def Distance(point1, point2):
+    d = _sub(point1, point2)
+    return math.sqrt(_dot(d, d))
+
+def AddPoint(point, y=None, z=None):
+    return tuple(point) if y is None else (point, y, z)
+
+def AddLine(start, end):
+    return Polyline([start, end])
+
+def AddPolyline(points):
+    return Polyline(points)
+
+def AddSrfPtGrid(count, points, degree=(3, 3), closed=(False, False)):
+    return GridSurface(count[0], count[1], [tuple(p) for p in points])
+
+def DeleteObject(object_id):
+    return True
+
+def DuplicateEdgeCurves(object_id, select=False):
+    return object_id.edge_curves()
+
+def JoinCurves(object_ids, delete_input=False, tolerance=None):
+    pts = []
+    for curve in object_ids:
+        pts.extend(curve.points if not pts else curve.points[1:])
+    return [Polyline(pts)]
+
+def CurvePoints(curve_id):
+    return list(curve_id.points)
+
+def PointInPlanarClosedCurve(point, curve, plane=None, tolerance=None): # Even-odd rule in XY
+    pts = curve.points
+    x, y = point[0], point[1]
+    inside = False
+    for (x0, y0, _), (x1, y1, _) in zip(pts, pts[1:] + pts[:1]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return 1 if inside else 0
+
+def CurveSurfaceIntersection(curve_id, surface_id, tolerance=-1, angle_tolerance=-1):
+    """First crossing of a line with a graph surface, found by marching + bisection."""
+    a, b = curve_id.points[0], curve_id.points[-1]
+
+    def gap(t): # Height of the line above the surface at parameter t
+        p = _add(a, _scale(_sub(b, a), t))
+        u, v = surface_id.closest_uv(p)
+        return p[2] - surface_id.point_at(u, v)[2], p
+
+    steps = 32
+    g0, _ = gap(0.0)
+    for k in range(1, steps + 1):
+        t1 = k / float(steps)
+        g1, _ = gap(t1)
+        if g0 == 0 or (g0 < 0) != (g1 < 0):
+            lo, hi = t1 - 1.0 / steps, t1
+            for _ in range(40):
+                mid = 0.5 * (lo + hi)
+                if (gap(lo)[0] < 0) != (gap(mid)[0] < 0):
+                    hi = mid
+                else:
+                    lo = mid
+            p = gap(0.5 * (lo + hi))[1]
+            return [[1, p, p, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]]
+        g0 = g1
+    return None
+
+_DOCUMENT = {} # Guid -> geometry, for scripts that receive referenced objects
+
+def add_to_document(geometry):
+    """Register geometry as a document object and return its Guid (like a referenced GH input)."""
+    guid = Guid()
+    _DOCUMENT[guid] = geometry
+    return guid
+
+def coercesurface(surface_id, raise_if_missing=False):
+    if isinstance(surface_id, Guid):
+        surface = _DOCUMENT.get(surface_id)
+        if surface is None and raise_if_missing:
+            raise ValueError("unable to find surface %s" % surface_id)
+        return surface
+    return surface_id if isinstance(surface_id, Surface) else None
+
+_RS_FUNCTIONS = ("SurfaceDomain", "EvaluateSurface", "SurfaceNormal", "SurfaceClosestPoint",
+                 "SurfaceCurvature", "VectorUnitize", "VectorScale", "VectorAdd", "VectorCreate",
+                 "PointAdd", "Distance", "AddPoint", "AddLine", "AddPolyline", "AddSrfPtGrid",
+                 "DeleteObject", "DuplicateEdgeCurves", "JoinCurves", "CurvePoints",
+                 "PointInPlanarClosedCurve", "CurveSurfaceIntersection", "coercesurface")
+
+# ---------------------------------------------------------------------------
+# MODULE REGISTRATION
+# ---------------------------------------------------------------------------
+class Guid:
+    pass
+
+class GH_ScriptInstance:
+    pass
+
+def install():
+    """Register rhinoscriptsyntax, Rhino, scriptcontext, Grasshopper and System in sys.modules."""
+    rs = types.ModuleType("rhinoscriptsyntax")
+    for name in _RS_FUNCTIONS:
+        setattr(rs, name, globals()[name])
+
+    geometry = types.ModuleType("Rhino.Geometry")
+    for cls in (Point3d, Vector3d, Interval, Line, PointCloud, Mesh, Surface):
+        setattr(geometry, cls.__name__, cls)
+    rhino = types.ModuleType("Rhino")
+    rhino.Geometry = geometry
+
+    sc = types.ModuleType("scriptcontext")
+    sc.sticky = {}
+
+    kernel = types.ModuleType("Grasshopper.Kernel")
+    kernel.GH_ScriptInstance = GH_ScriptInstance
+    grasshopper = types.ModuleType("Grasshopper")
+    grasshopper.Kernel = kernel
+
+    system = types.ModuleType("System")
+    system.Guid = Guid
+
+    sys.modules.update({
+        "rhinoscriptsyntax": rs,
+        "Rhino": rhino,
+        "Rhino.Geometry": geometry,
+        "scriptcontext": sc,
+        "Grasshopper": grasshopper,
+        "Grasshopper.Kernel": kernel,
+        "System": system,
+    })
+    return rs
@@ -0,0 +1,348 @@
+"""
+Benchmarks: Headless Benchmark Suite for Assignments 1-4
+Author: Laurids Ejersbo
+
+Description:
+Runs every assignment pipeline outside Rhino/Grasshopper and records wall
+time, peak memory (tracemalloc) and scaling curves across grid sizes,
+recursion depths and agent counts. The Grasshopper scripts run against the
+rhinoscriptsyntax stand-in in rhino_stub.py with analytic surfaces, and each
+case checks its geometry against the closed-form answer.
+
+Results are compared against baseline.json. Wall times are expressed in
+units of a fixed calibration workload timed in the same session, so the
+comparison survives machine load and hardware differences; cases faster
+than --min-seconds only gate on memory and correctness. A case that is
+slower or uses more memory than the baseline allows, or that fails a check,
+makes the run exit with status 1.
+
+Usage:
+    python run_benchmarks.py                    # run + compare against baseline.json
+    python run_benchmarks.py --update-baseline  # run + overwrite baseline.json
+    python run_benchmarks.py --only A3 --repeats 1
+"""
+
+# ---------------------------------------------------------------------------
+# IMPORTS
+# ---------------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import random
+import runpy
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg") # A1/A2 plot with matplotlib; never open a window
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+for folder in (HERE, os.path.join(REPO, "A4"), os.path.join(REPO, "shared")):
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+import numpy as np
+
+import rhino_stub
+
+rhino_stub.install()
+
+BASELINE = os.path.join(HERE, "baseline.json")
+
+def script(*parts):
+    return os.path.join(REPO, *parts)
+
+def run_gh_script(path, **inputs):
+    """Execute a Grasshopper script file with its component inputs as globals."""
+    return runpy.run_path(path, init_globals=inputs, run_name="__gh__")
+
+# ---------------------------------------------------------------------------
+# CHECK HELPERS
+# ---------------------------------------------------------------------------
+def expected_canopy_vertices(ns, size, lift=10.0):
+    """Closed form for a flat base surface: (U*size, V*size, H + lift) per grid point."""
+    U, V, H = ns["U"], ns["V"], ns["H"]
+    return np.column_stack(((U * size).ravel(), (V * size).ravel(), (H + lift).ravel()))
+
+def mesh_error(mesh, expected):
+    return float(np.abs(np.array(mesh.Vertices, dtype=float) - expected).max())
+
+# ---------------------------------------------------------------------------
+# CASES - each returns a dict of named checks {name: (ok, value)}; a check may
+# also be a callable returning (ok, value), evaluated after the timed runs
+# ---------------------------------------------------------------------------
+def a1_pattern():
+    ns = runpy.run_path(script("A1", "pattern_generator.py"), run_name="__main__")
+    import matplotlib.pyplot as plt
+    plt.close("all")
+    rgb = ns["canvas_rgb"]
+    return {"rgb in [0,1]": (bool(rgb.min() >= 0 and rgb.max() <= 1), float(rgb.max())),
+            "shape": (rgb.shape == (100, 100, 3), list(rgb.shape))}
+
+def a2_fractal(depth):
+    ns = runpy.run_path(script("A2", "fractal_generator.py"), run_name="fractal") # Skips the plotting block
+    ns["line_list"].clear()
+    random.seed(100)
+    ns["generate_fractal"](ns["start_point"], ns["initial_angle"], ns["initial_length"], 0, depth,
+                           ns["angle_change"], ns["length_scaling_factor"])
+    lines = ns["line_list"]
+    region = ns["allowed_region"].buffer(1e-9)
+    inside = all(region.contains(ns["Point"](line.coords[-1])) for line, _ in lines)
+    return {"ends inside region": (inside, len(lines)),
+            "at most binary tree": (len(lines) <= 2**(depth + 1) - 1, len(lines))}
+
+CANOPY_INPUTS = dict(amplitude=1.0, frequency=3.5, phase=1.0, seed=30, use_quad=False,
+                     n_branches=2, br_length=4.0, len_reduct=0.7, use_attractor=True)
+
+def a3_canopy(grid, depth, size=20.0):
+    ns = run_gh_script(script("A3", "parametric_canopy.py"),
+                       base_surface=rhino_stub.PlaneSurface(size), divU=grid, divV=grid,
+                       rec_depth=depth, **CANOPY_INPUTS)
+    mesh = ns["out_tessellation"]
+    err = mesh_error(mesh, expected_canopy_vertices(ns, size))
+    return {"vertices = (U*s, V*s, H+10)": (err < 1e-9, err),
+            "tri faces": (len(mesh.Faces) == 2 * (grid - 1)**2, len(mesh.Faces)),
+            "supports": (len(ns["out_supports"]) > 0, len(ns["out_supports"]))}
+
+def a4_surface(grid, size=20.0, use_float32=False):
+    ns = run_gh_script(script("A4", "surface_generator.py"),
+                       base_surface=rhino_stub.PlaneSurface(size), divU=grid, divV=grid,
+                       amplitude=1.0, frequency=3.5, phase=1.0, seed=30, use_quad=True,
+                       use_float32=use_float32)
+    mesh = ns["out_tessellation"]
+    err = mesh_error(mesh, expected_canopy_vertices(ns, size))
+    tolerance = 1e-5 if use_float32 else 1e-9 # float32 keeps ~7 significant digits at coordinates up to 20
+    return {"vertices = (U*s, V*s, H+10)": (err < tolerance, err),
+            "quad faces": (len(mesh.Faces) == (grid - 1)**2, len(mesh.Faces))}
+
+def a4_agents(num_agents, ticks=10, grid=20):
+    """agent_builder + agent_simulator (Grasshopper path) on a paraboloid."""
+    surface = rhino_stub.ParaboloidSurface(20.0)
+    field = run_gh_script(script("A4", "surface_generator.py"),
+                          base_surface=rhino_stub.PlaneSurface(20.0), divU=grid, divV=grid,
+                          amplitude=1.0, frequency=3.5, phase=1.0, seed=30, use_quad=True)
+    builder = run_gh_script(script("A4", "agent_builder.py"))
+    agents = builder["build_agents"](num_agents, surface, field["out_heightmap"], field["out_Ugrid"],
+                                     field["out_Vgrid"], slope_weight=1.0, curvature_weight=1.0, seed=1,
+                                     dH_du=field["out_dH_du"], dH_dv=field["out_dH_dv"])
+    sys.modules["scriptcontext"].sticky.clear()
+    for t in range(ticks):
+        out = run_gh_script(script("A4", "agent_simulator.py"), agents=agents if t == 0 else None, tick=True)
+    uv = np.array([a.uv for a in agents])
+    # Expected positions come from the normalized uv mapped onto the 0..20 surface domain - evaluating
+    # the raw uv (as Agent.move once did) would confine every agent to the [0,1]^2 corner
+    (u0, u1), (v0, v1) = surface.domain_u, surface.domain_v
+    on_surface = max(max(abs(a - b) for a, b in zip(ag.position, surface.point_at(u0 + ag.uv[0] * (u1 - u0),
+                                                                                   v0 + ag.uv[1] * (v1 - v0))))
+                     for ag in agents)
+    return {"uv in [0,1]": (bool(uv.min() >= 0 and uv.max() <= 1), float(uv.max())),
+            "positions on surface": (on_surface < 1e-9, on_surface),
+            "one point cloud": (out["P"].Count == num_agents, out["P"].Count),
+            "ticks": (all(a.age == ticks for a in agents), agents[0].age)}
+
+def a4_swarm(num_agents, ticks=50):
+    """Headless vectorized swarm (batch runner path)."""
+    from agent_swarm import build_swarm, tick
+    from batch_runner import DEFAULT_CONFIG, build_field, tick_kwargs
+    field = build_field(DEFAULT_CONFIG)
+    swarm = build_swarm(num_agents, 42)
+    kwargs = tick_kwargs(DEFAULT_CONFIG)
+    for _ in range(ticks):
+        tick(swarm, field, **kwargs)
+    return {"uv in [0,1]": (bool(swarm.uv.min() >= 0 and swarm.uv.max() <= 1), float(swarm.uv.max())),
+            "finite velocity": (bool(np.isfinite(swarm.velocity).all()), None)}
+
+def a4_panelization(num_agents, ticks=5, verify=False):
+    """Incremental Delaunay stage fed by the headless swarm."""
+    from agent_swarm import build_swarm, tick
+    from batch_runner import DEFAULT_CONFIG, build_field, tick_kwargs
+    from panelization import Panelizer
+    field = build_field(DEFAULT_CONFIG)
+    swarm = build_swarm(num_agents, 42)
+    panels = Panelizer(swarm.uv, field)
+    kwargs = tick_kwargs(DEFAULT_CONFIG)
+    for _ in range(ticks):
+        tick(swarm, field, **kwargs)
+        panels.update(swarm.uv)
+    vertices, faces = panels.mesh()
+    checks = {"faces": (len(faces) > 0, len(faces))}
+    if verify: # Brute-force check is O(N * F): deferred so it stays out of the timing
+        checks["empty circumcircles"] = lambda: (panels.delaunay.is_delaunay(), None)
+    return checks
+
+# ---------------------------------------------------------------------------
+# SUITE DEFINITION: (group, size label, size, callable)
+# ---------------------------------------------------------------------------
+def cases(quick=False):
+    grids = (10, 20) if quick else (10, 20, 40)
+    out = [("A1 pattern", "canvas", 100, a1_pattern)]
+    for d in ((6, 8) if quick else (6, 8, 10, 12)):
+        out.append(("A2 fractal depth", "depth", d, lambda d=d: a2_fractal(d)))
+    for g in grids:
+        out.append(("A3 canopy grid", "grid", g, lambda g=g: a3_canopy(g, 3)))
+    for d in ((2, 3) if quick else (2, 3, 4, 5)):
+        out.append(("A3 canopy depth", "depth", d, lambda d=d: a3_canopy(20, d)))
+    for g in grids + (() if quick else (80,)):
+        out.append(("A4 surface grid", "grid", g, lambda g=g: a4_surface(g)))
+    for g in grids[-1:] + (() if quick else (80,)):
+        out.append(("A4 surface grid float32", "grid", g, lambda g=g: a4_surface(g, use_float32=True)))
+    for n in ((20, 80) if quick else (20, 80, 320)):
+        out.append(("A4 agents (GH path)", "agents", n, lambda n=n: a4_agents(n)))
+    for n in ((1000, 10000) if quick else (1000, 10000, 100000)):
+        out.append(("A4 swarm (headless)", "agents", n, lambda n=n: a4_swarm(n)))
+    for n in ((500,) if quick else (500, 2000)):
+        out.append(("A4 panelization", "agents", n, lambda n=n: a4_panelization(n, verify=n <= 500)))
+    return out
+
+# ---------------------------------------------------------------------------
+# MEASUREMENT
+# ---------------------------------------------------------------------------
+def measure(fn, repeats):
+    """
+    One untraced warm-up (imports, caches), one traced run for peak memory,
+    then the median of `repeats` untraced runs for wall time.
+    """
+    fn()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    times = []
+    checks = None
+    for _ in range(max(1, repeats)):
+        t0 = time.perf_counter()
+        checks = fn()
+        times.append(time.perf_counter() - t0)
+    checks = {name: check() if callable(check) else check for name, check in checks.items()}
+    return float(np.median(times)), peak, checks
+
+def calibration_workload():
+    """Fixed mix of interpreter and NumPy work - the unit all case timings are expressed in."""
+    total = 0.0
+    for i in range(200000): # Pure-Python loop, like the rs-driven scripts
+        total += i * 0.5
+    x = np.linspace(0.0, 10.0, 500000)
+    for _ in range(5): # Elementwise NumPy, like the swarm and field code
+        total += float(np.sin(x).sum() + np.sqrt(x).sum())
+    return {}
+
+def calibrate(repeats=7):
+    """Median seconds of the calibration workload on this machine, right now."""
+    return measure(calibration_workload, repeats)[0]
+
+def scaling_exponents(results):
+    """Slope of log(time) against log(size) per group - 1.0 means linear scaling."""
+    groups = {}
+    for case in results.values():
+        groups.setdefault(case["group"], []).append((case["size"], case["seconds"]))
+    exponents = {}
+    for group, points in groups.items():
+        if len(points) >= 2:
+            x = np.log([p[0] for p in points])
+            y = np.log([max(p[1], 1e-9) for p in points])
+            exponents[group] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+def run_suite(repeats=5, only=None, quick=False):
+    """Run the selected cases. Returns (results, calibration seconds)."""
+    calibration = calibrate()
+    results = {}
+    for group, label, size, fn in cases(quick):
+        if only and not group.startswith(only):
+            continue
+        key = "%s=%d" % (group, size)
+        try:
+            seconds, peak, checks = measure(fn, repeats)
+        except ImportError as exc: # e.g. matplotlib / shapely missing for A1-A2
+            print("%-34s skipped (%s)" % (key, exc))
+            continue
+        results[key] = {
+            "group": group, "size_label": label, "size": size,
+            "seconds": seconds, "peak_kb": peak / 1024.0,
+            "checks": {name: {"ok": bool(ok), "value": value} for name, (ok, value) in checks.items()},
+        }
+        failed = [name for name, (ok, _) in checks.items() if not ok]
+        print("%-34s %9.4f s %10.1f kB  %s" % (key, seconds, peak / 1024.0,
+                                               "FAILED: " + ", ".join(failed) if failed else "ok"))
+    # Calibrate again at the end so a machine that slowed down mid-run is not blamed on the code
+    calibration = float(np.median([calibration, calibrate()]))
+    for case in results.values():
+        case["relative"] = case["seconds"] / calibration
+    return results, calibration
+
+def compare_to_baseline(results, baseline, time_tolerance, memory_tolerance, min_seconds=0.02, min_kb=256.0):
+    """
+    Return a list of regression messages (empty when everything is within tolerance).
+
+    Times are compared relative to the calibration workload of each session, so a
+    faster or busier machine does not shift every case. Cases whose baseline time
+    is below `min_seconds` are too noisy to gate on and are only checked for
+    correctness and memory. Memory growth below `min_kb` is ignored.
+    """
+    problems = []
+    for key, case in results.items():
+        for name, check in case["checks"].items():
+            if not check["ok"]:
+                problems.append("%s: check '%s' failed (%r)" % (key, name, check["value"]))
+        base = baseline.get("cases", {}).get(key)
+        if base is None:
+            continue
+        if "relative" in base and base["seconds"] >= min_seconds and case["relative"] > base["relative"] * (1.0 + time_tolerance):
+            problems.append("%s: %.1fx calibration vs baseline %.1fx (%.4f s vs %.4f s)"
+                            % (key, case["relative"], base["relative"], case["seconds"], base["seconds"]))
+        if case["peak_kb"] > max(base["peak_kb"] * (1.0 + memory_tolerance), base["peak_kb"] + min_kb):
+            problems.append("%s: %.1f kB vs baseline %.1f kB" % (key, case["peak_kb"], base["peak_kb"]))
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmark suite for A1-A4.")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per case (median is kept)")
+    parser.add_argument("--only", help="run only groups starting with this prefix, e.g. A3")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes (not comparable to a full baseline)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="allowed relative slowdown, 0.5 = +50%%")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory growth")
+    parser.add_argument("--min-seconds", type=float, default=0.02, help="faster baseline cases do not gate on time")
+    args = parser.parse_args(argv)
+
+    results, calibration = run_suite(args.repeats, args.only, args.quick)
+    report = {
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "calibration_seconds": calibration,
+        "cases": results,
+        "scaling": scaling_exponents(results),
+    }
+    print("\ncalibration workload: %.4f s" % calibration)
+    print("scaling exponents (time ~ size^k):")
+    for group, k in report["scaling"].items():
+        print("  %-32s k = %.2f" % (group, k))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print("baseline written to %s" % args.baseline)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline at %s (run with --update-baseline)" % args.baseline)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    problems = compare_to_baseline(results, baseline, args.time_tolerance, args.memory_tolerance,
+                                   args.min_seconds)
+    for problem in problems:
+        print("REGRESSION " + problem)
+    print("%d regressions" % len(problems))
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Shared: Lightweight Profiling for the Assignment Scripts
+Author: Laurids Ejersbo
+
+Description:
+Named timer spans, call counters for rhinoscriptsyntax and optional
+allocation tracking (tracemalloc) for the A3 and A4 scripts. Results are
+aggregated per run and per tick and can be written to a JSON report that
+can be compared against another run.
+
+When the profiler is disabled, span() hands back one shared no-op context
+manager and instrument() returns the module untouched, so switched-off
+instrumentation costs only a method call and an attribute check.
+Allocation tracking is opt-in: a profiler only stops tracemalloc if it started
+it, which it does in close() (call it once the report has been produced) and
+which resume() undoes for profilers that live across several solves.
+
+Usage (inside a script):
+    prof = Profiler(enabled=profile, track_allocations=profile_allocations)
+    rs = prof.instrument(rs) # counts every rs.* call
+    with prof.span("surface sampling"):
+        ...
+    out_profile = prof.to_json()
+    prof.close() # stops tracemalloc again if this profiler started it
+
+Comparing two reports:
+    python profiling.py before.json after.json
+"""
+
+# ---------------------------------------------------------------------------
+# IMPORTS
+# ---------------------------------------------------------------------------
+import json
+import sys
+import time
+import tracemalloc
+
+# ---------------------------------------------------------------------------
+# NO-OP CONTEXT (used while profiling is off)
+# ---------------------------------------------------------------------------
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+# ---------------------------------------------------------------------------
+# TIMER SPAN
+# ---------------------------------------------------------------------------
+class _Span:
+    __slots__ = ("profiler", "name", "t0", "m0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.track_allocations:
+            self.m0 = tracemalloc.get_traced_memory()[0]
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        allocated = tracemalloc.get_traced_memory()[0] - self.m0 if self.profiler.track_allocations else 0
+        self.profiler._record(self.name, elapsed, allocated)
+        return False
+
+# ---------------------------------------------------------------------------
+# CALL COUNTING PROXY
+# ---------------------------------------------------------------------------
+class _CountingModule:
+    """Forwards attribute access to a module and counts calls to its functions."""
+    def __init__(self, module, profiler, prefix):
+        self._module = module
+        self._profiler = profiler
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr):
+            return attr
+        profiler = self._profiler
+        key = self._prefix + name
+
+        def counted(*args, **kwargs):
+            profiler.count(key)
+            return attr(*args, **kwargs)
+        return counted
+
+# ---------------------------------------------------------------------------
+# PROFILER
+# ---------------------------------------------------------------------------
+def _new_stat():
+    return {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "alloc_bytes": 0}
+
+class Profiler:
+    """Collects span timings and counters for one run, optionally split per tick."""
+    def __init__(self, enabled=False, track_allocations=False, label=""):
+        self.enabled = bool(enabled)
+        self.track_allocations = self.enabled and bool(track_allocations)
+        self.label = label
+        self.spans = {} # Run totals: name -> stat dict
+        self.counters = {} # Run totals: name -> count
+        self.ticks = [] # One {"tick", "spans", "counters"} dict per profiled tick
+        self._tick = None
+        self._t_start = time.perf_counter()
+        self._owns_tracing = False # True while tracemalloc runs because this profiler started it
+        self._peak_bytes = 0 # Highest traced peak over all tracing sessions of this profiler
+        self.resume()
+
+    # -- allocation tracing -----------------------------------------------
+    def resume(self):
+        """(Re)start allocation tracing, e.g. at the start of the next solve."""
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracing = True
+
+    def close(self):
+        """Stop tracemalloc if this profiler started it, keeping the peak for report()."""
+        if self._owns_tracing and tracemalloc.is_tracing():
+            self._peak_bytes = max(self._peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        self._owns_tracing = False
+
+    def peak_traced_bytes(self):
+        current = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        return max(self._peak_bytes, current)
+
+    # -- recording --------------------------------------------------------
+    def span(self, name):
+        """Context manager timing the enclosed block under `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+        if self._tick is not None:
+            self._tick["counters"][name] = self._tick["counters"].get(name, 0) + n
+
+    def instrument(self, module, prefix="rs."):
+        """Return a stand-in for `module` that counts calls (the module itself when disabled)."""
+        if not self.enabled:
+            return getattr(module, "_module", module) # Also unwraps an earlier instrumented proxy
+        return _CountingModule(getattr(module, "_module", module), self, prefix)
+
+    def _record(self, name, elapsed, allocated):
+        targets = [self.spans]
+        if self._tick is not None:
+            targets.append(self._tick["spans"])
+        for table in targets:
+            stat = table.get(name)
+            if stat is None:
+                stat = table[name] = _new_stat()
+            stat["calls"] += 1
+            stat["seconds"] += elapsed
+            stat["alloc_bytes"] += allocated
+            if elapsed > stat["max_seconds"]:
+                stat["max_seconds"] = elapsed
+
+    # -- per tick aggregation ---------------------------------------------
+    def begin_tick(self, tick):
+        if self.enabled:
+            self._tick = {"tick": int(tick), "spans": {}, "counters": {}}
+
+    def end_tick(self):
+        if self.enabled and self._tick is not None:
+            self.ticks.append(self._tick)
+            self._tick = None
+
+    # -- reporting --------------------------------------------------------
+    def report(self):
+        """Plain dict with run totals, per-tick breakdown and peak traced memory."""
+        report = {
+            "label": self.label,
+            "enabled": self.enabled,
+            "wall_seconds": time.perf_counter() - self._t_start,
+            "spans": self.spans,
+            "counters": self.counters,
+            "ticks": self.ticks,
+        }
+        if self.track_allocations:
+            report["peak_traced_bytes"] = self.peak_traced_bytes()
+        return report
+
+    def to_json(self, path=None):
+        """Serialize the report; also writes it to `path` when given."""
+        text = json.dumps(self.report(), indent=2)
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def summary(self):
+        """Short text table of run totals, slowest span first."""
+        lines = ["%-28s %8s %10s %12s" % ("span", "calls", "seconds", "alloc kB")]
+        for name, stat in sorted(self.spans.items(), key=lambda kv: -kv[1]["seconds"]):
+            lines.append("%-28s %8d %10.4f %12.1f" % (name, stat["calls"], stat["seconds"], stat["alloc_bytes"] / 1024.0))
+        for name, n in sorted(self.counters.items()):
+            lines.append("%-28s %8d" % (name, n))
+        return "\n".join(lines)
+
+# ---------------------------------------------------------------------------
+# COMPARING RUNS
+# ---------------------------------------------------------------------------
+def compare(before, after):
+    """Per-span and per-counter (before, after, ratio) rows for two reports (dicts)."""
+    rows = []
+    for name in sorted(set(before["spans"]) | set(after["spans"])):
+        a = before["spans"].get(name, _new_stat())["seconds"]
+        b = after["spans"].get(name, _new_stat())["seconds"]
+        rows.append((name, a, b, b / a if a > 0 else float("inf")))
+    for name in sorted(set(before["counters"]) | set(after["counters"])):
+        a = before["counters"].get(name, 0)
+        b = after["counters"].get(name, 0)
+        rows.append((name, a, b, b / a if a > 0 else float("inf")))
+    return rows
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage: python profiling.py before.json after.json")
+        return 2
+    with open(argv[0]) as f:
+        before = json.load(f)
+    with open(argv[1]) as f:
+        after = json.load(f)
+    print("%-28s %12s %12s %8s" % ("name", "before", "after", "ratio"))
+    for name, a, b, ratio in compare(before, after):
+        print("%-28s %12.4g %12.4g %8.2f" % (name, a, b, ratio))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Shared: Surface Field Engine for the Canopy and Surface Scripts
+Author: Laurids Ejersbo
+
+Description:
+One implementation of the UV grid, heightmap and normal displacement used by
+A3/parametric_canopy.py, A4/surface_generator.py and (without a base surface)
+the headless A4 runners. All data lives in contiguous NumPy arrays of a
+single dtype - float64 by default, float32 to halve the memory:
+
+    U, V, heightmap, dH_du, dH_dv   (rows, cols)
+    points, normals                 (rows, cols, 3)
+
+The heightmap and its analytic derivatives share the wave and bump terms,
+every grid point is evaluated once on the base surface for both position and
+normal, and displacement, lift and scale are in-place array operations. The A4
+agent stage reads heightmap, U, V and the derivatives straight from here. No
+nested lists or per-point tuples are built; the Rhino mesh reads straight
+from the flat vertex array.
+
+Usage (inside a script):
+    field, surf, mesh = build_surface(base_surface, divU, divV, amplitude, frequency, phase,
+                                      quad=use_quad, prof=prof, rs=rs)
+
+or step by step:
+    field = SurfaceField.from_parameters(divU, divV, amplitude, frequency, phase)
+    field.displace(base_surface).lift(10)
+    surf = surface_from_point_grid(field.points)
+    mesh = mesh_from_points(field.points, quad=use_quad)
+"""
+
+# ---------------------------------------------------------------------------
+# IMPORTS
+# ---------------------------------------------------------------------------
+import math
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# GRID + HEIGHTMAP
+# ---------------------------------------------------------------------------
+def uv_grid(divU, divV, dtype=np.float64): # Normalized UV grid, shape (divV, divU)
+    us = np.linspace(0, 1, int(divU), dtype=dtype)
+    vs = np.linspace(0, 1, int(divV), dtype=dtype)
+    return np.meshgrid(us, vs, indexing='xy') # Returns contiguous copies
+
+def heightmap(U, V, amplitude, frequency, phase, out=None, derivatives=False):
+    """
+    amplitude * (0.6*wave + 0.4*bump) on the UV grid, written into `out` if given.
+    With derivatives=True also returns the analytic dH/du and dH/dv (per unit of
+    normalized UV), reusing the wave argument and the bump instead of recomputing them.
+    """
+    H = np.empty_like(U) if out is None else out
+    k = 2 * math.pi * frequency
+    arg = U + V # Wave argument, reused for cos() below
+    arg *= k
+    arg += phase
+    np.sin(arg, out=H) # Sine wave pattern on surface
+    H *= 0.6 * amplitude
+
+    du = U - 0.5 # Offsets from the central coordinate of the grid
+    dv = V - 0.5
+    bump = du * du
+    bump += dv * dv
+    bump *= -5
+    np.exp(bump, out=bump) # Surface bump depending on proximity to the grid centre
+    bump *= 0.4 * amplitude
+    H += bump
+    if not derivatives:
+        return H
+
+    np.cos(arg, out=arg) # d(wave)/du = d(wave)/dv = k * cos(arg)
+    arg *= 0.6 * amplitude * k
+    du *= bump # d(bump)/du = -10 * (u - 0.5) * bump
+    du *= -10
+    du += arg
+    dv *= bump
+    dv *= -10
+    dv += arg
+    return H, du, dv
+
+# ---------------------------------------------------------------------------
+# BASE SURFACE INPUT
+# ---------------------------------------------------------------------------
+def coerce_surface(surface):
+    """
+    RhinoCommon surface from a Grasshopper input: unwraps GH_Surface (.Geometry)
+    and resolves document GUIDs through rhinoscriptsyntax. Raises TypeError otherwise.
+    """
+    surface = getattr(surface, "Geometry", surface) # GH_Surface wrapper
+    if not hasattr(surface, "PointAt"): # GUID of a referenced object
+        try:
+            import rhinoscriptsyntax as rs
+            surface = rs.coercesurface(surface) or surface
+        except ImportError:
+            pass
+    if not (hasattr(surface, "PointAt") and hasattr(surface, "NormalAt")):
+        raise TypeError("base surface is not a valid Rhino surface. Got %s" % type(surface))
+    return surface
+
+# ---------------------------------------------------------------------------
+# FIELD
+# ---------------------------------------------------------------------------
+class SurfaceField:
+    """Heightmap, derivatives and displaced point grid over a base surface as flat arrays."""
+    def __init__(self, U, V, heightmap, dH_du, dH_dv):
+        self.U = U
+        self.V = V
+        self.heightmap = heightmap
+        self.dH_du = dH_du
+        self.dH_dv = dH_dv
+        self.rows, self.cols = heightmap.shape
+        self.dtype = heightmap.dtype
+        self.points = None # (rows, cols, 3), filled by displace()
+        self.normals = None # (rows, cols, 3) unit normals of the base surface
+
+    @classmethod
+    def from_parameters(cls, divU, divV, amplitude, frequency, phase, dtype=np.float64):
+        """Grid + heightmap + derivatives only (enough for the headless agent stage)."""
+        U, V = uv_grid(divU, divV, dtype)
+        H, dH_du, dH_dv = heightmap(U, V, amplitude, frequency, phase, derivatives=True)
+        return cls(U, V, H, dH_du, dH_dv)
+
+    def displace(self, surface):
+        """
+        Evaluate every grid point on a surface once (position and normal) and
+        offset it along the unit normal by the heightmap. Accepts anything
+        coerce_surface() does (RhinoCommon surface, GH wrapper, GUID).
+        """
+        surface = coerce_surface(surface)
+        dom_u = surface.Domain(0)
+        dom_v = surface.Domain(1)
+        # The grid is a tensor product, so one parameter row/column covers every point
+        u_params = (dom_u.T0 + self.U[0, :].astype(float) * (dom_u.T1 - dom_u.T0)).tolist()
+        v_params = (dom_v.T0 + self.V[:, 0].astype(float) * (dom_v.T1 - dom_v.T0)).tolist()
+
+        self.points = np.empty((self.rows, self.cols, 3), dtype=self.dtype)
+        self.normals = np.empty_like(self.points)
+        pf = self.points.reshape(-1) # Flat views, written one coordinate at a time
+        nf = self.normals.reshape(-1)
+        point_at = surface.PointAt
+        normal_at = surface.NormalAt
+        k = 0
+        for v in v_params:
+            for u in u_params:
+                p = point_at(u, v)
+                n = normal_at(u, v)
+                pf[k] = p.X; pf[k + 1] = p.Y; pf[k + 2] = p.Z
+                nf[k] = n.X; nf[k + 1] = n.Y; nf[k + 2] = n.Z
+                k += 3
+
+        # Unitize in place; degenerate normals fall back to the z-axis
+        length = np.sqrt((self.normals * self.normals).sum(axis=2))
+        bad = length == 0
+        self.normals[bad] = (0, 0, 1)
+        length[bad] = 1
+        self.normals /= length[..., None]
+
+        self.points += self.normals * self.heightmap[..., None] # Displacement along the normals
+        return self
+
+    def lift(self, dz): # Move the point grid vertically, in place
+        self.points[..., 2] += dz
+        return self
+
+    def scale(self, factor, origin=(0.0, 0.0, 0.0)): # Scale the point grid about `origin`, in place
+        origin = np.asarray(origin, dtype=self.dtype)
+        self.points -= origin
+        self.points *= factor
+        self.points += origin
+        return self
+
+# ---------------------------------------------------------------------------
+# RHINO OUTPUT (Rhino/rhinoscriptsyntax are only imported when geometry is requested)
+# ---------------------------------------------------------------------------
+def grid_faces(rows, cols, quad=False):
+    """(F, 4) quad or (F, 3) triangle vertex indices of a rows x cols point grid, row by row."""
+    idx = np.arange(rows * cols).reshape(rows, cols)
+    a = idx[:-1, :-1].ravel() # The four corners of every grid cell
+    b = idx[:-1, 1:].ravel()
+    c = idx[1:, 1:].ravel()
+    d = idx[1:, :-1].ravel()
+    if quad:
+        return np.column_stack((a, b, c, d))
+    faces = np.empty((2 * a.size, 3), dtype=idx.dtype)
+    faces[0::2] = np.column_stack((a, b, c)) # First of two triangles per cell
+    faces[1::2] = np.column_stack((a, c, d))
+    return faces
+
+def mesh_from_points(points, quad=False):
+    """Rhino mesh from a (rows, cols, 3) point array with quad or triangle faces."""
+    import Rhino
+    rows, cols = points.shape[:2]
+    mesh = Rhino.Geometry.Mesh()
+    add_vertex = mesh.Vertices.Add
+    for x, y, z in points.reshape(-1, 3).tolist():
+        add_vertex(x, y, z)
+    add_face = mesh.Faces.AddFace
+    for face in grid_faces(rows, cols, quad).tolist():
+        add_face(*face)
+    mesh.Normals.ComputeNormals()
+    mesh.Compact() # Removes redundancies
+    return mesh
+
+def surface_from_point_grid(points, rs=None):
+    """
+    NURBS surface through a (rows, cols, 3) point array. rs.AddSrfPtGrid wants a flat,
+    row-major point list, which is the array's own memory order. `rs` may be a
+    profiler's counting proxy; rhinoscriptsyntax is used otherwise.
+    """
+    if rs is None:
+        import rhinoscriptsyntax as rs
+    rows, cols = points.shape[:2] # rows corresponds to divV, cols to divU
+    return rs.AddSrfPtGrid((rows, cols), points.reshape(-1, 3).tolist())
+
+# ---------------------------------------------------------------------------
+# FULL PIPELINE (the EXECUTION block of A3/parametric_canopy.py and A4/surface_generator.py)
+# ---------------------------------------------------------------------------
+def build_surface(base_surface, divU, divV, amplitude, frequency, phase, quad=False,
+                  dtype=np.float64, lift=10, prof=None, rs=None):
+    """
+    Heightmap -> displacement along the base surface normals -> lift -> NURBS surface
+    and mesh. Returns (field, surface, mesh); every phase is timed on `prof` if given.
+    """
+    if prof is None:
+        from profiling import Profiler
+        prof = Profiler(enabled=False)
+    with prof.span("heightmap"):
+        field = SurfaceField.from_parameters(divU, divV, amplitude, frequency, phase, dtype)
+    with prof.span("surface displacement"):
+        field.displace(base_surface) # Each surface point is evaluated once and moved along its normal by H[i,j]
+    with prof.span("lift"):
+        field.lift(lift)
+    with prof.span("AddSrfPtGrid"):
+        surface = surface_from_point_grid(field.points, rs)
+    with prof.span("mesh build"):
+        mesh = mesh_from_points(field.points, quad=quad)
+    return field, surface, mesh